@@ -1,14 +1,17 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
+import threading
 import time
 from datetime import datetime
 import logging
 from modules.audio_processor import AudioProcessor
-from modules.transcriber import Transcriber
 from modules.summarizer import Summarizer
-from modules.utils import setup_logging, save_results, clean_memory, get_timestamp
+from modules.cache import TranscriptCache, hash_file, make_key
+from modules.checkpoint import TranscriptionCheckpoint
+from modules.utils import setup_logging, save_results, clean_memory, get_timestamp, JobWorkspace
 from modules.language import LANGUAGES, get_text
-from config import SUMMARY_CHUNK_SIZE, SUMMARY_MODEL_PRIMARY, SUMMARY_MODEL_FALLBACK, RESULT_DIR, APP_NAME, VERSION, DATA_DIR
+from config import SUMMARY_MODEL_PRIMARY, SUMMARY_MODEL_FALLBACK, RESULT_DIR, APP_NAME, VERSION, AUDIO_DECODE_MODE, VAD_ENABLED, TRANSCRIPT_CACHE_ENABLED, CHECKPOINT_ENABLED, WHISPER_LANGUAGE, SAMPLE_RATE, SEGMENT_DURATION_MS
 import os
 
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
@@ -102,8 +105,12 @@ if 'process_complete' not in st.session_state:
     st.session_state.process_complete = False
 if 'stop_requested' not in st.session_state:
     st.session_state.stop_requested = False
+if 'cancel_event' not in st.session_state:
+    st.session_state.cancel_event = threading.Event()
 if 'transcription_result' not in st.session_state:
     st.session_state.transcription_result = ""
+if 'transcript' not in st.session_state:
+    st.session_state.transcript = None
 if 'summary_result' not in st.session_state:
     st.session_state.summary_result = ""
 if 'transcription_file' not in st.session_state:
@@ -114,6 +121,8 @@ if 'summary_file' not in st.session_state:
 def stop_processing():
     st.session_state.stop_requested = True
     st.session_state.process_running = False
+    # Yalnızca bu oturumun işini iptal eder; diğer oturumların model çağrıları etkilenmez
+    st.session_state.cancel_event.set()
     logger.info("İşlemi durdurma isteği alındı")
 
 with st.sidebar:
@@ -152,6 +161,15 @@ with st.sidebar:
         """
         st.markdown(file_details, unsafe_allow_html=True)
     
+    audio_language_options = ["auto", "tr", "en"]
+    audio_language = st.selectbox(
+        get_lang_text("audio_language"),
+        options=audio_language_options,
+        format_func=lambda x: get_lang_text(f"audio_language_{x}"),
+        index=audio_language_options.index(WHISPER_LANGUAGE) if WHISPER_LANGUAGE in audio_language_options else 0,
+        help=get_lang_text("audio_language_help")
+    )
+    
     # Özet seçenekleri bölümünü ekle
     st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
     st.subheader(get_lang_text("summary_options"))
@@ -178,6 +196,7 @@ with st.sidebar:
                 st.session_state.process_running = True
                 st.session_state.stop_requested = False
                 st.session_state.process_complete = False
+                st.session_state.cancel_event = threading.Event()
     
     with col2:
         if st.session_state.process_running:
@@ -219,10 +238,17 @@ with st.sidebar:
             st.info(get_lang_text("no_processes"))
 
 if uploaded_file and st.session_state.process_running and not st.session_state.process_complete:
-    with st.status(get_lang_text("processing"), expanded=True) as status:
+    # torch ve transformers yalnızca bir iş başladığında yüklenir; sayfa bunları beklemeden açılır
+    from modules.transcriber import Transcriber
+    from modules.sharded_transcriber import ShardedTranscriber
+    
+    JobWorkspace.cleanup_stale()
+    TranscriptionCheckpoint.cleanup_stale()
+    cancel_event = st.session_state.cancel_event
+    with st.status(get_lang_text("processing"), expanded=True) as status, JobWorkspace() as workspace:
         try:
-            timestamp = get_timestamp()
-            temp_path = os.path.join(DATA_DIR, f"upload_{timestamp}{os.path.splitext(uploaded_file.name)[1]}")
+            logger.info(f"İş başlatıldı: {workspace.job_id} ({uploaded_file.name})")
+            temp_path = workspace.file(f"upload{os.path.splitext(uploaded_file.name)[1]}")
             
             with open(temp_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
@@ -236,41 +262,120 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
             status_text.markdown(f"**{get_lang_text('audio_converting')}**")
             progress_bar.progress(10)
             audio_processor = AudioProcessor()
-            wav_file = audio_processor.convert_to_wav(temp_path)
+            transcript_cache = TranscriptCache() if TRANSCRIPT_CACHE_ENABLED else None
+            decoding_params = Transcriber.decoding_params(audio_language)
+            # Önbellekten gelen transkripsiyonda dil yalnızca kullanıcı seçtiyse bilinir
+            transcript_lang = None if audio_language == "auto" else audio_language
+            upload_hash = hash_file(temp_path)
+            audio_hash = None
+            cache_keys = []
+            transcript = None
             
-            if st.session_state.stop_requested:
-                raise Exception(get_lang_text("process_stopped"))
+            if transcript_cache:
+                cache_keys.append(TranscriptCache.make_key(upload_hash, decoding_params))
+                transcript = transcript_cache.get(cache_keys[0])
+            
+            if transcript is None:
+                pcm_file = samples = None
+                decode_parallel = AUDIO_DECODE_MODE == "mmap" and audio_processor.should_decode_parallel(temp_path)
+                if decode_parallel:
+                    logger.info("Uzun kayıt, segmentler paralel çözülecek")
+                elif AUDIO_DECODE_MODE == "mmap":
+                    samples, pcm_file = audio_processor.decode_to_pcm(temp_path, workspace.path)
+                elif AUDIO_DECODE_MODE == "stream":
+                    samples = audio_processor.decode_to_array(temp_path)
+                else:
+                    wav_file = audio_processor.convert_to_wav(temp_path, workspace.path)
                 
-            status_text.markdown(f"**{get_lang_text('audio_splitting')}**")
-            progress_bar.progress(20)
-            segment_files = audio_processor.split_audio(wav_file)
+                if samples is not None:
+                    audio_hash = audio_processor.fingerprint(samples)
+                    if transcript_cache:
+                        cache_keys.append(TranscriptCache.make_key(audio_hash, decoding_params))
+                        transcript = transcript_cache.get(cache_keys[-1])
             
             if st.session_state.stop_requested:
                 raise Exception(get_lang_text("process_stopped"))
-                
-            status_text.markdown(f"**{get_lang_text('transcribing')}**")
-            transcriber = Transcriber()
             
-            total_segments = len(segment_files)
-            for i, (segment_file, _) in enumerate(segment_files):
+            if transcript is not None:
+                status_text.markdown(f"**{get_lang_text('transcript_cached')}**")
+                transcript_cache.put(cache_keys, transcript)
+                transcription = transcript.text
+            else:
+                status_text.markdown(f"**{get_lang_text('audio_splitting')}**")
+                progress_bar.progress(20)
+                if decode_parallel:
+                    segment_files = audio_processor.iter_parallel_segments(temp_path, workspace.path, use_vad=VAD_ENABLED)
+                    audio_seconds = audio_processor.probe_duration(temp_path)
+                    temp_files = []
+                elif AUDIO_DECODE_MODE in ("mmap", "stream"):
+                    if VAD_ENABLED:
+                        segment_files = audio_processor.split_on_speech(samples)
+                    else:
+                        segment_files = audio_processor.split_samples(samples)
+                    audio_seconds = len(samples) / SAMPLE_RATE
+                    temp_files = [pcm_file] if pcm_file else []
+                else:
+                    segment_files = audio_processor.split_audio(wav_file, workspace.path)
+                    audio_seconds = len(segment_files) * SEGMENT_DURATION_MS / 1000
+                    temp_files = [path for path, _, _ in segment_files] + [wav_file]
+                
                 if st.session_state.stop_requested:
                     raise Exception(get_lang_text("process_stopped"))
                     
-                sub_progress = 20 + (i / total_segments * 30)
-                progress_bar.progress(int(sub_progress))
-                status_text.markdown(f"**{get_lang_text('transcribing_segment').format(i+1, total_segments)}**")
-            
-            transcription = transcriber.transcribe_segments(segment_files)
-            transcriber.cleanup()
-            
-            if not transcription or transcription.strip() == "":
-                st.error(get_lang_text("transcription_error"))
-                status.update(label=get_lang_text("process_failed"), state="error")
-                st.session_state.process_running = False
-                st.stop()
-            
-            segment_paths = [path for path, _ in segment_files]
-            audio_processor.cleanup_temp_files(segment_paths + [wav_file])
+                status_text.markdown(f"**{get_lang_text('transcribing')}**")
+                if ShardedTranscriber.enabled():
+                    transcriber = ShardedTranscriber(language=audio_language)
+                else:
+                    transcriber = Transcriber(language=audio_language)
+                checkpoint = None
+                if CHECKPOINT_ENABLED:
+                    # Çözülmüş ses biliniyorsa aynı kaydın farklı kapsayıcı/bit hızındaki yüklemesi de kaldığı yerden sürer
+                    checkpoint = TranscriptionCheckpoint(make_key("checkpoint", audio_hash or upload_hash, decoding_params))
+                    if len(checkpoint):
+                        st.info(get_lang_text("transcription_resumed").format(len(checkpoint)))
+                
+                with st.expander(get_lang_text("partial_transcription"), expanded=True):
+                    partial_view = st.empty()
+                partial_texts = []
+                
+                def show_segment_progress(result):
+                    if st.session_state.stop_requested:
+                        raise Exception(get_lang_text("process_stopped"))
+                    
+                    fraction = min(1.0, result["end_s"] / audio_seconds) if audio_seconds else 0
+                    progress_bar.progress(int(20 + fraction * 30))
+                    status_text.markdown(f"**{get_lang_text('transcribing_progress').format(result['completed'], result['total'] or '?', min(result['end_s'], audio_seconds), audio_seconds, result['throughput'] or 0)}**")
+                    
+                    if result["text"]:
+                        partial_texts.append(result["text"])
+                        partial_view.markdown(" ".join(partial_texts))
+                
+                try:
+                    transcript = transcriber.transcribe(segment_files, progress_callback=show_segment_progress,
+                                                        checkpoint=checkpoint)
+                finally:
+                    transcriber.cleanup()
+                
+                transcription = transcript.text
+                transcript_lang = transcriber.language
+                if not transcription or transcription.strip() == "":
+                    st.error(get_lang_text("transcription_error"))
+                    status.update(label=get_lang_text("process_failed"), state="error")
+                    st.session_state.process_running = False
+                    st.stop()
+                
+                # Eksik transkripsiyon önbelleğe yazılmaz; kontrol noktası eksik segmentlerin tek kaydıdır
+                failed_segments = transcriber.last_run_stats.get("failed_segments", 0)
+                if failed_segments:
+                    st.warning(get_lang_text("transcription_incomplete").format(failed_segments))
+                else:
+                    if transcript_cache:
+                        transcript_cache.put(cache_keys, transcript)
+                    if checkpoint is not None:
+                        checkpoint.remove()
+                
+                samples = segment_files = None
+                audio_processor.cleanup_temp_files(temp_files)
             
             if st.session_state.stop_requested:
                 raise Exception(get_lang_text("process_stopped"))
@@ -289,10 +394,28 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
                 else:
                     status_text.markdown(f"**{get_lang_text('basic_summarizing')}**")
                 
+                with st.expander(get_lang_text("partial_summary"), expanded=True):
+                    summary_view = st.empty()
+                last_render = [0.0]
+                script_ctx = get_script_run_ctx()
+                
+                def show_summary_progress(text):
+                    # Gelişmiş modda akış görev grafiğinin iş parçacığından gelir
+                    add_script_run_ctx(threading.current_thread(), script_ctx)
+                    # Her token'da yeniden çizmek yerine en fazla saniyede birkaç kez güncelle
+                    now = time.time()
+                    if now - last_render[0] >= 0.25:
+                        last_render[0] = now
+                        summary_view.markdown(text)
+                
                 summary = summarizer.summarize_text(
                     transcription=transcription,
                     mode=summary_mode,
+                    lang=transcript_lang,
+                    on_update=show_summary_progress,
+                    cancel_event=cancel_event,
                 )
+                summary_view.markdown(summary)
                 
                 if summary and len(summary) > 200:
                     status_text.markdown(f"**{get_lang_text('summary_success')}**")
@@ -311,9 +434,12 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
                 status_text.markdown(f"**{get_lang_text('fallback_model')}**")
                 
                 try:
+                    transcript_lang = transcript_lang or summarizer.detect_language(transcription)
                     quick_summary = summarizer.create_quick_summary(
                         text=transcription[:4000],
-                        timeout=90
+                        timeout=90,
+                        lang=transcript_lang,
+                        cancel_event=cancel_event
                     )
                     
                     status_text.markdown(f"**{get_lang_text('summarizing_model').format(SUMMARY_MODEL_FALLBACK)}**")
@@ -322,7 +448,9 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
                     comprehensive_summary = summarizer.create_comprehensive_summary(
                         text=transcription,
                         quick_summary=quick_summary,
-                        timeout=300
+                        timeout=300,
+                        lang=transcript_lang,
+                        cancel_event=cancel_event
                     )
                     
                     if comprehensive_summary and len(comprehensive_summary) > 300:
@@ -348,7 +476,8 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
             transcription_file, summary_file = save_results(
                 transcription, 
                 summary, 
-                original_filename
+                original_filename,
+                transcript=transcript
             )
             
             progress_bar.progress(100)
@@ -357,6 +486,7 @@ if uploaded_file and st.session_state.process_running and not st.session_state.p
             time.sleep(1)
             
             st.session_state.transcription_result = transcription
+            st.session_state.transcript = transcript
             st.session_state.summary_result = summary
             st.session_state.transcription_file = transcription_file
             st.session_state.summary_file = summary_file
@@ -430,6 +560,21 @@ if st.session_state.process_complete:
                 mime="text/plain"
             ):
                 st.success(get_lang_text("transcription_downloaded"))
+        with col2:
+            transcript = st.session_state.transcript
+            if transcript is not None and len(transcript) > 1:
+                st.download_button(
+                    label=get_lang_text("download_srt_button"),
+                    data=transcript.to_srt(),
+                    file_name=f"transcription_{get_timestamp()}.srt",
+                    mime="application/x-subrip"
+                )
+                st.download_button(
+                    label=get_lang_text("download_vtt_button"),
+                    data=transcript.to_vtt(),
+                    file_name=f"transcription_{get_timestamp()}.vtt",
+                    mime="text/vtt"
+                )
     
     with tabs[2]:
         st.header(get_lang_text("saved_files_header"))
@@ -18,18 +18,96 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 TEMP_DIR = os.path.join(DATA_DIR, "temp")
 RESULT_DIR = os.path.join(DATA_DIR, "results")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, "transcripts")
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm")
 
 WHISPER_MODEL = "openai/whisper-large-v3-turbo"
+WHISPER_IDLE_EVICT_S = 15 * 60  # bu süre boyunca kullanılmayan Whisper modeli bellekten atılır
+WHISPER_EVICT_MIN_FREE_MB = 2048  # boştaki model, kullanılabilir bellek bu değerin altına düşünce atılır
+WHISPER_CACHE_CHECK_INTERVAL_S = 30
+
+WHISPER_DEVICE = "auto"  # "auto", "cuda" veya "cpu"
+WHISPER_CPU_DTYPE = "float32"  # CPU'da "float32" veya "bfloat16"
+WHISPER_CPU_QUANTIZE = True  # CPU'da linear katmanlara dinamik int8 nicemleme (yalnızca float32)
+WHISPER_CPU_THREADS = None  # None: tüm çekirdekler
+WHISPER_CPU_INTEROP_THREADS = 1
+WHISPER_SHARD_WORKERS = 1  # CPU'da >1 ise her biri kendi model kopyasını tutan bu kadar süreç çalışır
+WHISPER_SHARD_THREADS = None  # süreç başına iş parçacığı; None: çekirdek sayısı / süreç sayısı
+WHISPER_LANGUAGE = "auto"  # "auto": ilk konuşmadan bir kez tespit edilir; "tr" veya "en": sabit
+# Taslak modelle yardımlı (spekülatif) çözme; çıktı ana modelinkiyle aynıdır. large-v3-turbo'nun çözücüsü zaten
+# 4 katmanlı olduğundan kazanç küçüktür; açmadan önce "python -m modules.benchmark assisted" ile ölçün
+WHISPER_ASSISTED_DECODING = False
+WHISPER_ASSISTANT_MODEL = "distil-whisper/distil-large-v3"  # yalnızca çözücüsü yüklenir; kodlayıcı ana modelle paylaşılır
+WHISPER_ASSISTANT_LANGUAGES = ("en",)  # taslağın eğitildiği diller; diğer dillerde taslak kullanılmaz
+WHISPER_BACKEND = "hf"  # "hf": transformers pipeline, "ct2": faster-whisper (CTranslate2)
+WHISPER_CT2_MODEL = "deepdml/faster-whisper-large-v3-turbo-ct2"
+WHISPER_CT2_COMPUTE_TYPE = "int8"  # CPU'da; GPU'da float16 kullanılır
+WHISPER_CT2_BEAM_SIZE = 1
 SUMMARY_MODEL_PRIMARY = "deepseek-r1:32b"
 SUMMARY_MODEL_FALLBACK = "llama3:8b"  
 
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_POOL_SIZE = 4  # açık tutulan boştaki HTTP bağlantısı sayısı
+OLLAMA_CONNECT_TIMEOUT = 10
+OLLAMA_KEEP_ALIVE = "30m"  # model son istekten sonra sunucu belleğinde bu kadar tutulur
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))  # sunucunun eşzamanlı istek sınırıyla aynı olmalı
+OLLAMA_REGISTRY_TTL_S = 60  # model listesi bu süreden eskiyse arka planda yenilenir
+OLLAMA_REGISTRY_RETRY_S = 5  # sunucuya ulaşılamadığında yeniden deneme aralığı
+OLLAMA_CANCEL_POLL_S = 0.2  # ilk yanıt ve eşzamanlılık sırası beklenirken iptalin yoklanma aralığı
+
 MAX_INPUT_TOKENS = 4000  
 MAX_META_SUMMARY_TOKENS = 8000  
+SUMMARY_PROMPT_RESERVE_TOKENS = 400  # parça bütçesinden istem şablonu için ayrılan pay
+SUMMARY_NUM_PREDICT = 4000  # tek çağrıda üretilecek en fazla token
+# En uzun istem (ara özet + şablon) ile üretim birlikte sığmalı; sunucu varsayılanı istemi sessizce keser
+OLLAMA_NUM_CTX = MAX_META_SUMMARY_TOKENS + SUMMARY_PROMPT_RESERVE_TOKENS + SUMMARY_NUM_PREDICT
+SUMMARY_TOKENIZER = None  # ör. "meta-llama/Meta-Llama-3-8B"; None: dile göre karakter/token oranıyla tahmin
+SUMMARY_CHARS_PER_TOKEN = {"tr": 3.0, "en": 4.2}
+SUMMARY_CHUNK_OVERLAP_TOKENS = 200
+RETRIEVAL_WINDOW_SENTENCES = 4  # bölüm geliştirmede aranan transkript penceresinin cümle sayısı
+RETRIEVAL_WINDOW_STRIDE = 2
+RETRIEVAL_TOP_K = 6
+RETRIEVAL_MAX_TOKENS = 1500  # bölüm başına istemlere eklenen ilgili metin bütçesi
 
 SEGMENT_DURATION_MS = 300 * 1000  
-SUMMARY_CHUNK_SIZE = 3000
+SAMPLE_RATE = 16000
+# "mmap": ffmpeg çıktısı tek bir PCM dosyasına yazılıp belleğe eşlenir,
+# "stream": ffmpeg çıktısı doğrudan NumPy dizisine okunur, "file": pydub ile geçici WAV dosyaları
+AUDIO_DECODE_MODE = "mmap"
+FFMPEG_BINARY = "ffmpeg"
+FFPROBE_BINARY = "ffprobe"
+
+# Uzun kayıtlar ffmpeg ile konum atlayarak (seek) pencere pencere paralel çözülür
+PARALLEL_DECODE_MIN_DURATION_S = 1800
+PARALLEL_DECODE_WINDOW_MS = SEGMENT_DURATION_MS
+PARALLEL_DECODE_WORKERS = None  # None: işlemci çekirdeği sayısı
+
+# Enerji tabanlı konuşma tespiti (VAD) ile segmentleme
+VAD_ENABLED = True
+VAD_FRAME_MS = 30
+VAD_ENERGY_MARGIN_DB = 10  # gürültü tabanının üzerindeki konuşma eşiği
+VAD_MIN_ENERGY_DB = -50
+VAD_MIN_SILENCE_MS = 700
+VAD_SPEECH_PAD_MS = 200
+VAD_MAX_INNER_SILENCE_MS = 2000  # bir segment içinde tutulabilecek en uzun sessizlik
+VAD_TARGET_SEGMENT_MS = 240 * 1000
+VAD_MAX_SEGMENT_MS = SEGMENT_DURATION_MS
 
 DEVICE_MAP = "auto"
 
-for directory in [DATA_DIR, TEMP_DIR, RESULT_DIR]:
+JOB_WORKSPACE_MAX_AGE_HOURS = 24  # bu süreden eski, sahipsiz iş dizinleri silinir
+
+TRANSCRIPT_CACHE_ENABLED = True
+TRANSCRIPT_CACHE_MAX_MB = 512
+
+LLM_CACHE_ENABLED = True
+LLM_CACHE_MAX_MB = 256
+LLM_CACHE_MEMORY_ENTRIES = 256
+
+CHECKPOINT_ENABLED = True
+CHECKPOINT_MAX_AGE_HOURS = 72
+
+for directory in [DATA_DIR, TEMP_DIR, RESULT_DIR, CACHE_DIR, TRANSCRIPT_CACHE_DIR, CHECKPOINT_DIR, LLM_CACHE_DIR]:
     os.makedirs(directory, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,232 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+import numpy as np
+from config import (WHISPER_MODEL, SAMPLE_RATE, WHISPER_CPU_INTEROP_THREADS, WHISPER_ASSISTANT_MODEL,
+                    WHISPER_ASSISTANT_LANGUAGES,
+                    WHISPER_CT2_MODEL, WHISPER_CT2_COMPUTE_TYPE, WHISPER_CT2_BEAM_SIZE)
+from modules.audio_processor import AudioProcessor
+
+logger = logging.getLogger(__name__)
+
+def configure_torch_threads(threads: Optional[int] = None,
+                            interop_threads: Optional[int] = WHISPER_CPU_INTEROP_THREADS) -> None:
+    """PyTorch intra-op ve inter-op iş parçacığı sayılarını çekirdek sayısına göre ayarlar."""
+    import torch
+
+    threads = threads or os.cpu_count() or 1
+    torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # inter-op havuzu ilk paralel işten sonra değiştirilemez
+            pass
+    logger.info(f"CPU iş parçacıkları: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+class ASRBackend(ABC):
+    """Whisper çıkarım motorları için ortak arayüz.
+
+    Tüm arka uçlar segment başına Hugging Face pipeline çıktısıyla aynı yapıda sözlük döndürür:
+    {"text": ..., "chunks": [{"timestamp": (başlangıç, bitiş), "text": ...}, ...]}; zamanlar
+    segment başına görelidir. Böylece Transcriber ve uygulamanın geri kalanı motordan bağımsızdır.
+    """
+
+    name = ""
+
+    def __init__(self, device: str, dtype: str, quantize: bool, cpu_threads: Optional[int] = None,
+                 assisted: bool = False):
+        self.device = device
+        self.dtype = dtype
+        self.quantize = quantize
+        self.cpu_threads = cpu_threads
+        self.assisted = assisted
+
+    @staticmethod
+    @abstractmethod
+    def decoding_params() -> Dict[str, Any]:
+        """Çıktıyı etkileyen motor ayarlarını (önbellek anahtarları için) döndürür."""
+
+    @abstractmethod
+    def load(self) -> "ASRBackend":
+        """Modeli yükler ve motoru döndürür."""
+
+    @abstractmethod
+    def transcribe(self, segments: Iterable[Union[str, np.ndarray]], language: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Segmentleri sırayla transkribe eder; her segment için bir çıktı üretir."""
+
+    def transcribe_one(self, segment: Union[str, np.ndarray], language: Optional[str]) -> Dict[str, Any]:
+        return next(iter(self.transcribe([segment], language)))
+
+    @abstractmethod
+    def detect_language(self, samples: np.ndarray) -> Optional[str]:
+        """16 kHz float32 örneklerde (en fazla 30 sn) konuşulan dili ISO kodu olarak döndürür."""
+
+
+class HFPipelineBackend(ASRBackend):
+    """transformers pipeline tabanlı motor; GPU'da float16, CPU'da float32/bfloat16 ve dinamik int8."""
+
+    name = "hf"
+    PIPELINE_PARAMS = {
+        "return_timestamps": True,
+        "batch_size": 16,
+        "chunk_length_s": 30,
+    }
+
+    @staticmethod
+    def decoding_params() -> Dict[str, Any]:
+        params = {key: value for key, value in HFPipelineBackend.PIPELINE_PARAMS.items() if key != "batch_size"}
+        params["model"] = WHISPER_MODEL
+        return params
+
+    def load(self) -> "HFPipelineBackend":
+        import torch
+        from transformers import pipeline
+
+        logger.info(f"Whisper modeli yükleniyor: {WHISPER_MODEL} ({self.device}, {self.dtype}"
+                    f"{', int8 dinamik nicemleme' if self.quantize else ''})")
+        if self.device == "cpu":
+            configure_torch_threads(self.cpu_threads)
+
+        self.pipeline = pipeline(
+            "automatic-speech-recognition",
+            model=WHISPER_MODEL,
+            device=self.device,
+            torch_dtype=getattr(torch, self.dtype)
+        )
+
+        if self.quantize:
+            self.pipeline.model = torch.ao.quantization.quantize_dynamic(
+                self.pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.assistant_model = self._build_assistant() if self.assisted else None
+        return self
+
+    def _build_assistant(self):
+        """Yardımlı çözmede token taslağı üreten küçük Whisper çözücüsünü yükler.
+
+        Yalnızca çözücü (AutoModelForCausalLM) yüklenir; taslak ana modelin kodlayıcı çıktılarını
+        kullanır, böylece her parçada ikinci bir 32 katmanlı kodlayıcı çalışmaz.
+        """
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        logger.info(f"Taslak çözücü yükleniyor: {WHISPER_ASSISTANT_MODEL}")
+        assistant = AutoModelForCausalLM.from_pretrained(
+            WHISPER_ASSISTANT_MODEL,
+            torch_dtype=getattr(torch, self.dtype),
+            low_cpu_mem_usage=True,
+        ).to(self.device)
+        if self.quantize:
+            assistant = torch.ao.quantization.quantize_dynamic(assistant, {torch.nn.Linear}, dtype=torch.qint8)
+        return assistant
+
+    def _pipeline_params(self, language: Optional[str]) -> Dict[str, Any]:
+        """Pipeline çağrı parametrelerini, sabitlenmiş dil ve taslak model için generate_kwargs ile döndürür."""
+        params = dict(self.PIPELINE_PARAMS)
+        generate_kwargs = {}
+        if language:
+            generate_kwargs.update({"language": language, "task": "transcribe"})
+        if self.assistant_model is not None and language in WHISPER_ASSISTANT_LANGUAGES:
+            # Yardımlı üretim yalnızca tek örnekli batch'lerle çalışır
+            generate_kwargs["assistant_model"] = self.assistant_model
+            params["batch_size"] = 1
+        if generate_kwargs:
+            params["generate_kwargs"] = generate_kwargs
+        return params
+
+    @staticmethod
+    def _as_pipeline_input(segment: Union[str, np.ndarray]):
+        """Segment dosya yolunu veya NumPy dizisini (bellek eşlemli görünümler dahil) pipeline girdisine çevirir."""
+        if isinstance(segment, np.ndarray):
+            return {"raw": AudioProcessor.to_float32(segment), "sampling_rate": SAMPLE_RATE}
+        return segment
+
+    def transcribe(self, segments: Iterable[Union[str, np.ndarray]], language: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Segmentleri tek bir akış olarak pipeline'a verir.
+
+        Pipeline 30 saniyelik parçaları farklı segmentlerden de olsa aynı batch'te toplar;
+        böylece kısa segmentler batch_size'ı boş bırakmaz.
+        """
+        inputs = (self._as_pipeline_input(segment) for segment in segments)
+        return iter(self.pipeline(inputs, **self._pipeline_params(language)))
+
+    def transcribe_one(self, segment: Union[str, np.ndarray], language: Optional[str]) -> Dict[str, Any]:
+        return self.pipeline(inputs=self._as_pipeline_input(segment), **self._pipeline_params(language))
+
+    def detect_language(self, samples: np.ndarray) -> Optional[str]:
+        import torch
+
+        features = self.pipeline.feature_extractor(samples, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+        features = features.to(self.pipeline.device, dtype=self.pipeline.model.dtype)
+        if not hasattr(self.pipeline.model, "detect_language"):
+            import transformers
+            raise RuntimeError(f"Whisper dil tespiti transformers>=4.38.0 gerektirir (yüklü: {transformers.__version__})")
+        with torch.inference_mode():
+            language_ids = self.pipeline.model.detect_language(features)
+        return self.pipeline.tokenizer.decode(language_ids[0]).strip("<|>")
+
+
+class CTranslate2Backend(ASRBackend):
+    """faster-whisper (CTranslate2) tabanlı motor; CPU'da int8 çıkarım için optimize edilmiştir."""
+
+    name = "ct2"
+
+    @staticmethod
+    def decoding_params() -> Dict[str, Any]:
+        return {"model": WHISPER_CT2_MODEL, "compute_type": WHISPER_CT2_COMPUTE_TYPE, "beam_size": WHISPER_CT2_BEAM_SIZE}
+
+    def load(self) -> "CTranslate2Backend":
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("CTranslate2 arka ucu için faster-whisper paketi gerekli: pip install faster-whisper") from e
+
+        if self.assisted:
+            logger.warning("Yardımlı çözme CTranslate2 arka ucunda desteklenmiyor, atlanıyor")
+        compute_type = WHISPER_CT2_COMPUTE_TYPE if self.device == "cpu" else "float16"
+        logger.info(f"Whisper modeli yükleniyor: {WHISPER_CT2_MODEL} (CTranslate2, {self.device}, {compute_type})")
+        self.model = WhisperModel(
+            WHISPER_CT2_MODEL,
+            device=self.device,
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads or os.cpu_count() or 1,
+        )
+        return self
+
+    @staticmethod
+    def _as_model_input(segment: Union[str, np.ndarray]) -> Union[str, np.ndarray]:
+        if isinstance(segment, np.ndarray):
+            return np.ascontiguousarray(AudioProcessor.to_float32(segment), dtype=np.float32)
+        return segment
+
+    def transcribe(self, segments: Iterable[Union[str, np.ndarray]], language: Optional[str]) -> Iterator[Dict[str, Any]]:
+        for segment in segments:
+            yield self.transcribe_one(segment, language)
+
+    def transcribe_one(self, segment: Union[str, np.ndarray], language: Optional[str]) -> Dict[str, Any]:
+        parts, _ = self.model.transcribe(
+            self._as_model_input(segment),
+            language=language,
+            task="transcribe",
+            beam_size=WHISPER_CT2_BEAM_SIZE,
+            condition_on_previous_text=False,
+        )
+        chunks = [{"timestamp": (part.start, part.end), "text": part.text} for part in parts]
+        return {"text": "".join(chunk["text"] for chunk in chunks), "chunks": chunks}
+
+    def detect_language(self, samples: np.ndarray) -> Optional[str]:
+        # transcribe dili hemen belirler; dönen üreteç tüketilmediği için çözme yapılmaz
+        _, info = self.model.transcribe(np.ascontiguousarray(samples, dtype=np.float32), beam_size=1)
+        return info.language
+
+
+BACKENDS = {backend.name: backend for backend in (HFPipelineBackend, CTranslate2Backend)}
+
+def get_backend_class(name: str) -> type:
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen ASR arka ucu: {name} (seçenekler: {', '.join(BACKENDS)})")
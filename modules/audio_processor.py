@@ -1,17 +1,447 @@
-from pydub import AudioSegment
+import hashlib
+import math
 import os
-from typing import List, Tuple
+import struct
+import subprocess
+import threading
+import wave
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 import logging
-from config import TEMP_DIR, SEGMENT_DURATION_MS
+from config import (TEMP_DIR, SEGMENT_DURATION_MS, SAMPLE_RATE, FFMPEG_BINARY, FFPROBE_BINARY,
+                    PARALLEL_DECODE_MIN_DURATION_S, PARALLEL_DECODE_WINDOW_MS, PARALLEL_DECODE_WORKERS, VAD_FRAME_MS,
+                    VAD_ENERGY_MARGIN_DB, VAD_MIN_ENERGY_DB, VAD_MIN_SILENCE_MS, VAD_SPEECH_PAD_MS,
+                    VAD_MAX_INNER_SILENCE_MS, VAD_TARGET_SEGMENT_MS, VAD_MAX_SEGMENT_MS)
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_BYTES = 1024 * 1024
+ENERGY_BLOCK_SAMPLES = 60 * SAMPLE_RATE
+
+class SpeechSegment(np.ndarray):
+    """Aralarındaki uzun sessizlikler çıkarılarak birleştirilmiş konuşma aralıklarından oluşan segment.
+
+    spans her aralık için (segment içindeki başlangıç sn, segment ofsetine göre kaynaktaki başlangıç sn)
+    çiftlerini tutar; segment içi zamanlar bu eşlemeyle kaynak kayıttaki zamanlara çevrilir.
+    """
+
+    def __array_finalize__(self, obj):
+        self.spans = getattr(obj, "spans", None)
+
+
 class AudioProcessor:
     @staticmethod
-    def convert_to_wav(input_file: str) -> str:
+    def is_whisper_ready_wav(input_file: str) -> bool:
+        """Dosyanın zaten 16 kHz mono 16-bit PCM WAV olup olmadığını kontrol eder."""
+        if not input_file.lower().endswith(".wav"):
+            return False
+        try:
+            with wave.open(input_file, "rb") as wav:
+                return (wav.getframerate() == SAMPLE_RATE
+                        and wav.getnchannels() == 1
+                        and wav.getsampwidth() == 2)
+        except (wave.Error, EOFError):
+            return False
+
+    @staticmethod
+    def read_wav_samples(wav_file: str) -> np.ndarray:
+        """16 kHz mono PCM WAV dosyasını dönüştürmeden float32 diziye okur."""
+        with wave.open(wav_file, "rb") as wav:
+            frames = wav.readframes(wav.getnframes())
+        return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+    @staticmethod
+    def wav_data_range(wav_file: str) -> Tuple[int, int]:
+        """WAV dosyasındaki PCM verisinin bayt ofsetini ve uzunluğunu bulur."""
+        file_size = os.path.getsize(wav_file)
+        with open(wav_file, "rb") as f:
+            f.seek(12)
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"WAV dosyasında veri bölümü bulunamadı: {wav_file}")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"data":
+                    offset = f.tell()
+                    return offset, min(chunk_size, file_size - offset)
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+    @staticmethod
+    def to_float32(samples: np.ndarray) -> np.ndarray:
+        """16-bit PCM örneklerini Whisper'ın beklediği [-1, 1] aralığındaki float32'ye çevirir."""
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) / 32768.0
+        return samples
+
+    @staticmethod
+    def fingerprint(samples: np.ndarray) -> str:
+        """Çözülmüş ses örneklerinin içerik özetini blok blok hesaplar."""
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(f"{samples.dtype.str}:{SAMPLE_RATE}:".encode("ascii"))
+        for start in range(0, len(samples), ENERGY_BLOCK_SAMPLES):
+            hasher.update(np.ascontiguousarray(samples[start:start + ENERGY_BLOCK_SAMPLES]).tobytes())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def decode_to_pcm(input_file: str, output_dir: str = TEMP_DIR) -> Tuple[np.ndarray, Optional[str]]:
+        """Sesi tek bir ham PCM dosyasına bir kez çözer ve belleğe eşlenmiş dizi olarak döndürür.
+
+        Dosya zaten 16 kHz mono WAV ise veri bölümü doğrudan eşlenir ve PCM dosyası oluşturulmaz.
+        """
         try:
+            if AudioProcessor.is_whisper_ready_wav(input_file):
+                offset, size = AudioProcessor.wav_data_range(input_file)
+                logger.info(f"Dosya zaten {SAMPLE_RATE} Hz mono WAV, doğrudan belleğe eşleniyor: {input_file}")
+                if size < 2:
+                    return np.zeros(0, dtype=np.int16), None
+                return np.memmap(input_file, dtype="<i2", mode="r", offset=offset, shape=(size // 2,)), None
+
             base_filename = os.path.splitext(os.path.basename(input_file))[0]
-            output_wav_file = os.path.join(TEMP_DIR, f"{base_filename}.wav")
+            pcm_file = os.path.join(output_dir, f"{base_filename}.f32")
+            command = [
+                FFMPEG_BINARY, "-nostdin", "-v", "error",
+                "-i", input_file,
+                "-f", "f32le", "-acodec", "pcm_f32le",
+                "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-"
+            ]
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+            with open(pcm_file, "wb") as f:
+                while True:
+                    chunk = process.stdout.read(STREAM_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+
+            stderr = process.stderr.read().decode("utf-8", errors="replace")
+            if process.wait() != 0:
+                AudioProcessor.cleanup_temp_files([pcm_file])
+                raise RuntimeError(f"ffmpeg çözme hatası (kod {process.returncode}): {stderr}")
+
+            sample_count = os.path.getsize(pcm_file) // 4
+            logger.info(f"Dosya PCM olarak çözüldü: {pcm_file} ({sample_count / SAMPLE_RATE:.1f}s)")
+            if sample_count == 0:
+                return np.zeros(0, dtype=np.float32), pcm_file
+
+            return np.memmap(pcm_file, dtype="<f4", mode="r", shape=(sample_count,)), pcm_file
+        except Exception as e:
+            logger.error(f"Ses çözme hatası: {e}")
+            raise
+
+    @staticmethod
+    def probe_duration(input_file: str) -> float:
+        """Dosyanın süresini çözmeden ffprobe ile saniye olarak okur."""
+        command = [
+            FFPROBE_BINARY, "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            input_file
+        ]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=60, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe hatası (kod {result.returncode}): {result.stderr}")
+        return float(result.stdout.strip())
+
+    @staticmethod
+    def should_decode_parallel(input_file: str) -> bool:
+        """Dosyanın pencere pencere paralel çözülecek kadar uzun olup olmadığını belirler."""
+        if AudioProcessor.is_whisper_ready_wav(input_file):
+            return False
+        try:
+            return AudioProcessor.probe_duration(input_file) >= PARALLEL_DECODE_MIN_DURATION_S
+        except Exception as e:
+            logger.warning(f"Süre okunamadı, seri çözme kullanılacak: {e}")
+            return False
+
+    @staticmethod
+    def _decode_window(input_file: str, pcm_file: str, start_sample: int, sample_count: Optional[int],
+                       processes: Optional[List[subprocess.Popen]] = None,
+                       cancelled: Optional[threading.Event] = None) -> int:
+        """Tek bir zaman penceresini ffmpeg ile konum atlayarak çözer ve PCM dosyasındaki yerine yazar.
+
+        processes verilirse başlatılan ffmpeg süreci ona eklenir; cancelled ayarlanmışsa süreç hemen sonlandırılır.
+        """
+        command = [FFMPEG_BINARY, "-nostdin", "-v", "error", "-ss", f"{start_sample / SAMPLE_RATE:.6f}"]
+        if sample_count is not None:
+            command += ["-t", f"{sample_count / SAMPLE_RATE:.6f}"]
+        command += [
+            "-i", input_file,
+            "-f", "f32le", "-acodec", "pcm_f32le",
+            "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-"
+        ]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if processes is not None:
+            processes.append(process)
+        # Süreç listeye eklenmeden önce iptal edildiyse sonlandırma döngüsü onu görmemiş olabilir
+        if cancelled is not None and cancelled.is_set():
+            process.terminate()
+
+        limit = None if sample_count is None else sample_count * 4
+        written = 0
+        with open(pcm_file, "r+b") as f:
+            f.seek(start_sample * 4)
+            while True:
+                chunk = process.stdout.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if limit is not None:
+                    chunk = chunk[:limit - written]
+                f.write(chunk)
+                written += len(chunk)
+
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg pencere çözme hatası ({start_sample / SAMPLE_RATE:.1f}s, kod {process.returncode}): {stderr}")
+
+        return written // 4 if sample_count is None else sample_count
+
+    @staticmethod
+    def iter_parallel_segments(input_file: str, output_dir: str = TEMP_DIR,
+                               workers: Optional[int] = PARALLEL_DECODE_WORKERS,
+                               use_vad: bool = True) -> Iterator[Tuple[np.ndarray, int, int]]:
+        """Uzun kayıtları pencerelere ayırıp eşzamanlı ffmpeg süreçleriyle çözer.
+
+        Segmentler sırayla, ilgili pencere hazır olur olmaz üretilir; böylece transkripsiyon
+        tüm dosyanın çözülmesini beklemeden başlayabilir. Pencereler aynı PCM dosyasına yazıldığından
+        her pencerenin son segmenti üretilmez, bir sonraki pencereyle birlikte yeniden bölünür;
+        böylece kesimler pencere sınırlarına değil sessizliklere düşer.
+        """
+        duration = AudioProcessor.probe_duration(input_file)
+        window = PARALLEL_DECODE_WINDOW_MS * SAMPLE_RATE // 1000
+        total_samples = math.ceil(duration * SAMPLE_RATE)
+        starts = list(range(0, total_samples, window)) or [0]
+        workers = workers or os.cpu_count() or 1
+
+        base_filename = os.path.splitext(os.path.basename(input_file))[0]
+        pcm_file = os.path.join(output_dir, f"{base_filename}.f32")
+        with open(pcm_file, "wb") as f:
+            f.truncate(total_samples * 4)
+
+        logger.info(f"Paralel çözme: {duration:.1f}s, {len(starts)} pencere, {workers} işçi")
+        executor = ThreadPoolExecutor(max_workers=workers)
+        processes: List[subprocess.Popen] = []
+        cancelled = threading.Event()
+        futures = [
+            executor.submit(AudioProcessor._decode_window, input_file, pcm_file, start,
+                            None if idx == len(starts) - 1 else window, processes, cancelled)
+            for idx, start in enumerate(starts)
+        ]
+
+        try:
+            idx = 0
+            # Henüz segment olarak üretilmemiş ilk örnek
+            pending_start = 0
+            for window_idx, (start, future) in enumerate(zip(starts, futures)):
+                end = start + future.result()
+                if end <= pending_start:
+                    continue
+                samples = np.memmap(pcm_file, dtype="<f4", mode="r", offset=pending_start * 4,
+                                    shape=(end - pending_start,))
+                window_segments = (AudioProcessor.split_on_speech(samples) if use_vad
+                                   else AudioProcessor.split_samples(samples))
+                next_start = end
+                if window_idx < len(starts) - 1 and window_segments:
+                    # Pencere sonuna kadar uzanabilen son segment sonraki pencereyle birlikte bölünür
+                    _, _, tail_offset_ms = window_segments.pop()
+                    next_start = pending_start + tail_offset_ms * SAMPLE_RATE // 1000
+                for segment, _, offset_ms in window_segments:
+                    yield segment, idx, pending_start * 1000 // SAMPLE_RATE + offset_ms
+                    idx += 1
+                pending_start = next_start
+        finally:
+            # İş durdurulduysa veya hata verdiyse süren ffmpeg süreçleri sonlandırılır; iş parçacıkları
+            # çalışma dizini silinmeden önce PCM dosyasını bırakmış olur
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            for process in list(processes):
+                if process.poll() is None:
+                    process.terminate()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def decode_to_array(input_file: str) -> np.ndarray:
+        """Ses dosyasını ffmpeg ile doğrudan 16 kHz mono float32 NumPy dizisine çözer."""
+        try:
+            if AudioProcessor.is_whisper_ready_wav(input_file):
+                logger.info(f"Dosya zaten {SAMPLE_RATE} Hz mono WAV, dönüştürme atlanıyor: {input_file}")
+                return AudioProcessor.read_wav_samples(input_file)
+
+            command = [
+                FFMPEG_BINARY, "-nostdin", "-v", "error",
+                "-i", input_file,
+                "-f", "f32le", "-acodec", "pcm_f32le",
+                "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-"
+            ]
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+            buffer = bytearray()
+            while True:
+                chunk = process.stdout.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                buffer.extend(chunk)
+
+            stderr = process.stderr.read().decode("utf-8", errors="replace")
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg çözme hatası (kod {process.returncode}): {stderr}")
+
+            sample_count = len(buffer) // 4
+            samples = np.frombuffer(buffer, dtype=np.float32, count=sample_count)
+            logger.info(f"Dosya belleğe çözüldü: {input_file} ({sample_count / SAMPLE_RATE:.1f}s)")
+
+            return samples
+        except Exception as e:
+            logger.error(f"Ses çözme hatası: {e}")
+            raise
+
+    @staticmethod
+    def split_samples(samples: np.ndarray) -> List[Tuple[np.ndarray, int, int]]:
+        """Çözülmüş ses dizisini kopyalamadan SEGMENT_DURATION_MS uzunluğunda parçalara böler."""
+        segment_length = SEGMENT_DURATION_MS * SAMPLE_RATE // 1000
+        segments = [
+            (samples[start:start + segment_length], idx, start * 1000 // SAMPLE_RATE)
+            for idx, start in enumerate(range(0, len(samples), segment_length))
+        ]
+
+        logger.info(f"Ses verisi {len(segments)} parçaya bölündü")
+        return segments
+
+    @staticmethod
+    def frame_energies_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+        """Her VAD çerçevesinin ortalama enerjisini dB olarak hesaplar."""
+        frame_count = len(samples) // frame_length
+        energies = np.empty(frame_count, dtype=np.float32)
+        block_frames = max(1, ENERGY_BLOCK_SAMPLES // frame_length)
+
+        for start in range(0, frame_count, block_frames):
+            stop = min(frame_count, start + block_frames)
+            block = AudioProcessor.to_float32(samples[start * frame_length:stop * frame_length])
+            block = block.reshape(stop - start, frame_length)
+            energies[start:stop] = np.mean(block * block, axis=1)
+
+        return 10 * np.log10(energies + 1e-10)
+
+    @staticmethod
+    def detect_speech_regions(energies: np.ndarray) -> List[Tuple[int, int]]:
+        """Enerji eşiğini aşan çerçevelerden konuşma bölgelerini (çerçeve aralığı) çıkarır."""
+        if energies.size == 0:
+            return []
+
+        noise_floor, speech_level = (float(level) for level in np.percentile(energies, [10, 90]))
+        threshold = max(VAD_MIN_ENERGY_DB, min(noise_floor + VAD_ENERGY_MARGIN_DB, speech_level - VAD_ENERGY_MARGIN_DB))
+        speech = np.concatenate(([False], energies > threshold, [False]))
+        changes = np.flatnonzero(speech[1:] != speech[:-1])
+
+        min_gap = VAD_MIN_SILENCE_MS // VAD_FRAME_MS
+        pad = VAD_SPEECH_PAD_MS // VAD_FRAME_MS
+        regions = []
+        for start, end in zip(changes[::2], changes[1::2]):
+            start, end = max(0, start - pad), min(energies.size, end + pad)
+            if regions and start - regions[-1][1] < min_gap:
+                regions[-1][1] = max(regions[-1][1], end)
+            else:
+                regions.append([start, end])
+
+        return [(int(start), int(end)) for start, end in regions]
+
+    @staticmethod
+    def first_speech_window(samples: np.ndarray, seconds: float) -> np.ndarray:
+        """Örneklerde ilk konuşma bölgesinden başlayan en fazla verilen uzunluktaki pencereyi döndürür."""
+        frame_length = SAMPLE_RATE * VAD_FRAME_MS // 1000
+        regions = AudioProcessor.detect_speech_regions(AudioProcessor.frame_energies_db(samples, frame_length))
+        start = regions[0][0] * frame_length if regions else 0
+        return samples[start:start + int(seconds * SAMPLE_RATE)]
+
+    @staticmethod
+    def _quietest_cut(energies: np.ndarray, start: int, end: int) -> int:
+        """Verilen çerçeve aralığındaki en sessiz çerçeveyi kesim noktası olarak döndürür."""
+        if end <= start:
+            return end
+        return start + int(np.argmin(energies[start:end]))
+
+    @staticmethod
+    def _join_runs(samples: np.ndarray, runs: List[Tuple[int, int]]) -> np.ndarray:
+        """Örnek aralıklarını tek segmentte birleştirir; tek aralık kopyalanmadan görünüm olarak döner."""
+        if len(runs) == 1:
+            return samples[runs[0][0]:runs[0][1]]
+        segment = np.concatenate([samples[start:end] for start, end in runs]).view(SpeechSegment)
+        spans, position = [], 0
+        for start, end in runs:
+            spans.append((position / SAMPLE_RATE, (start - runs[0][0]) / SAMPLE_RATE))
+            position += end - start
+        segment.spans = tuple(spans)
+        return segment
+
+    @staticmethod
+    def split_on_speech(samples: np.ndarray) -> List[Tuple[np.ndarray, int, int]]:
+        """Sessiz bölgeleri atar ve konuşma aralıklarını VAD_TARGET_SEGMENT_MS uzunluğuna kadar birleştirir.
+
+        VAD_MAX_INNER_SILENCE_MS'den kısa sessizlikler segmentte bırakılır; daha uzun olanlar
+        çıkarılır ve iki yanındaki konuşma aralıkları birleştirilir (SpeechSegment). Böylece
+        sık duraklamalı kayıtlar da batch'leri dolduracak uzunlukta segmentler üretir.
+        Konuşma bulunamazsa segment üretilmez.
+        """
+        frame_length = SAMPLE_RATE * VAD_FRAME_MS // 1000
+        energies = AudioProcessor.frame_energies_db(samples, frame_length)
+        regions = AudioProcessor.detect_speech_regions(energies)
+        if not regions:
+            logger.warning("Konuşma tespit edilemedi, segment üretilmedi")
+            return []
+
+        target = VAD_TARGET_SEGMENT_MS // VAD_FRAME_MS
+        maximum = VAD_MAX_SEGMENT_MS // VAD_FRAME_MS
+        max_inner_silence = VAD_MAX_INNER_SILENCE_MS // VAD_FRAME_MS
+
+        pieces = []
+        for start, end in regions:
+            while end - start > maximum:
+                cut = AudioProcessor._quietest_cut(energies, start + min(target, maximum) // 2, start + maximum)
+                pieces.append((start, cut))
+                start = cut
+            pieces.append((start, end))
+
+        # Her grup, aralarındaki kısa sessizlik korunmuş ardışık aralıklardan (run) oluşur
+        groups = []
+        group_length = 0
+        for start, end in pieces:
+            if groups:
+                gap = start - groups[-1][-1][1]
+                kept_gap = gap if gap <= max_inner_silence else 0
+                if group_length + kept_gap + end - start <= target:
+                    if kept_gap or gap == 0:
+                        groups[-1][-1][1] = end
+                    else:
+                        groups[-1].append([start, end])
+                    group_length += kept_gap + end - start
+                    continue
+            groups.append([[start, end]])
+            group_length = end - start
+
+        segments = []
+        for idx, runs in enumerate(groups):
+            sample_runs = [(start * frame_length, len(samples) if end == energies.size else end * frame_length)
+                           for start, end in runs]
+            segment = AudioProcessor._join_runs(samples, sample_runs)
+            segments.append((segment, idx, sample_runs[0][0] * 1000 // SAMPLE_RATE))
+
+        total = len(samples) or 1
+        speech_ratio = sum(len(segment) for segment, _, _ in segments) / total
+        logger.info(f"Konuşma tespiti: {len(segments)} segment, sesin %{speech_ratio * 100:.1f}'i konuşma")
+        return segments
+
+    @staticmethod
+    def convert_to_wav(input_file: str, output_dir: str = TEMP_DIR) -> str:
+        # pydub yalnızca "file" çözme modunda gerekir; uygulama açılışını yavaşlatmaması için burada yüklenir
+        from pydub import AudioSegment
+
+        try:
+            base_filename = os.path.splitext(os.path.basename(input_file))[0]
+            output_wav_file = os.path.join(output_dir, f"{base_filename}.wav")
             
             audio = AudioSegment.from_file(input_file)
             audio.export(output_wav_file, format="wav")
@@ -23,16 +453,18 @@ class AudioProcessor:
             raise
 
     @staticmethod
-    def split_audio(wav_file: str) -> List[Tuple[str, int]]:
+    def split_audio(wav_file: str, output_dir: str = TEMP_DIR) -> List[Tuple[str, int, int]]:
+        from pydub import AudioSegment
+
         try:
             audio = AudioSegment.from_wav(wav_file)
             segments = [audio[i:i+SEGMENT_DURATION_MS] for i in range(0, len(audio), SEGMENT_DURATION_MS)]
             
             segment_files = []
             for idx, segment in enumerate(segments):
-                segment_path = os.path.join(TEMP_DIR, f"segment_{idx}.wav")
+                segment_path = os.path.join(output_dir, f"segment_{idx}.wav")
                 segment.export(segment_path, format="wav")
-                segment_files.append((segment_path, idx))
+                segment_files.append((segment_path, idx, idx * SEGMENT_DURATION_MS))
             
             logger.info(f"Ses dosyası {len(segments)} parçaya bölündü")
             return segment_files
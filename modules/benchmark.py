@@ -0,0 +1,307 @@
+"""Performans ölçüm araçları.
+
+Kullanım:
+    python -m modules.benchmark cpu kayit1.mp3 kayit2.wav
+    python -m modules.benchmark shards --workers 1 2 4 8 kayit1.mp3
+    python -m modules.benchmark imports
+    python -m modules.benchmark assisted ders_tr.mp3 lecture_en.mp3
+    python -m modules.benchmark backends kayit1.mp3
+"""
+import argparse
+import ast
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+from config import RESULT_DIR
+from modules.utils import get_timestamp
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (etiket, CPU veri tipi, dinamik int8 nicemleme)
+CPU_CONFIGS = [
+    ("float16 (mevcut yol)", "float16", False),
+    ("float32", "float32", False),
+    ("float32 + int8", "float32", True),
+    ("bfloat16", "bfloat16", False),
+]
+
+def load_segments(audio_files: Sequence[str]) -> List[Tuple[Any, int, int]]:
+    """Ölçüm dosyalarını bir kez çözer ve tüm segmentleri tek bir listede toplar."""
+    from modules.audio_processor import AudioProcessor
+
+    segments = []
+    for audio_file in audio_files:
+        samples = AudioProcessor.decode_to_array(audio_file)
+        for segment, _, offset_ms in AudioProcessor.split_on_speech(samples):
+            segments.append((segment, len(segments), offset_ms))
+    return segments
+
+def benchmark_cpu_precisions(audio_files: Sequence[str],
+                             configs: Sequence[Tuple[str, str, bool]] = CPU_CONFIGS) -> List[Dict[str, Any]]:
+    """Her CPU hassasiyet yapılandırması için yükleme süresini ve gerçek zaman oranını (RTF) ölçer."""
+    from modules.transcriber import Transcriber, MODEL_CACHE
+
+    segments = load_segments(audio_files)
+    rows = []
+    for label, dtype, quantize in configs:
+        row = {"config": label}
+        transcriber = Transcriber(device="cpu", cpu_dtype=dtype, cpu_quantize=quantize)
+        try:
+            start_time = time.time()
+            transcriber.load_model()
+            row["load_seconds"] = round(time.time() - start_time, 2)
+            row["text"] = transcriber.transcribe_segments(segments)
+            row.update(transcriber.last_run_stats)
+        except Exception as e:
+            logger.error(f"{label} ölçümü başarısız: {e}")
+            row["error"] = str(e)
+        finally:
+            transcriber.cleanup()
+            MODEL_CACHE.evict("ölçüm")
+        rows.append(row)
+
+    baseline = next((row for row in rows if row.get("rtf")), None)
+    for row in rows:
+        if baseline and row.get("rtf"):
+            row["speedup"] = round(baseline["rtf"] / row["rtf"], 2)
+            row["same_text"] = row["text"] == baseline["text"]
+    return rows
+
+def benchmark_shard_scaling(audio_files: Sequence[str], worker_counts: Sequence[int]) -> List[Dict[str, Any]]:
+    """Çok süreçli CPU transkripsiyonunun çalışan sayısına göre verim ölçeklenmesini ölçer."""
+    from modules.sharded_transcriber import ShardedTranscriber
+
+    segments = load_segments(audio_files)
+    rows = []
+    for workers in worker_counts:
+        transcriber = ShardedTranscriber(workers=workers)
+        row = {"config": f"{workers} süreç x {transcriber.threads_per_worker} iş parçacığı"}
+        try:
+            start_time = time.time()
+            transcriber.load_model()
+            row["load_seconds"] = round(time.time() - start_time, 2)
+            row["text"] = transcriber.transcribe_segments(segments)
+            row.update(transcriber.last_run_stats)
+            if row.get("elapsed_seconds"):
+                row["throughput"] = round(row["audio_seconds"] / row["elapsed_seconds"], 2)
+        except Exception as e:
+            logger.error(f"{workers} süreçli ölçüm başarısız: {e}")
+            row["error"] = str(e)
+        finally:
+            transcriber.cleanup()
+        rows.append(row)
+
+    baseline = next((row for row in rows if row.get("throughput")), None)
+    for row in rows:
+        if baseline and row.get("throughput"):
+            row["speedup"] = round(row["throughput"] / baseline["throughput"], 2)
+            row["same_text"] = row["text"] == baseline["text"]
+    return rows
+
+def benchmark_assisted_decoding(audio_files: Sequence[str]) -> List[Dict[str, Any]]:
+    """Her kayıt için taslak modelli yardımlı çözmeyi normal çözmeyle hız ve metin eşliği açısından karşılaştırır."""
+    from modules.transcriber import Transcriber, MODEL_CACHE
+
+    rows = []
+    for audio_file in audio_files:
+        segments = load_segments([audio_file])
+        baseline = None
+        for assisted in (False, True):
+            row = {"config": f"{os.path.basename(audio_file)} — {'yardımlı' if assisted else 'normal'}"}
+            transcriber = Transcriber(assisted=assisted)
+            try:
+                start_time = time.time()
+                transcriber.load_model()
+                row["load_seconds"] = round(time.time() - start_time, 2)
+                row["text"] = transcriber.transcribe_segments(segments)
+                row.update(transcriber.last_run_stats)
+                row["language"] = transcriber.language
+            except Exception as e:
+                logger.error(f"{row['config']} ölçümü başarısız: {e}")
+                row["error"] = str(e)
+            finally:
+                transcriber.cleanup()
+                MODEL_CACHE.evict("ölçüm")
+            rows.append(row)
+
+            if not assisted:
+                baseline = row
+            elif baseline and baseline.get("rtf") and row.get("rtf"):
+                row["speedup"] = round(baseline["rtf"] / row["rtf"], 2)
+                row["same_text"] = row["text"] == baseline["text"]
+    return rows
+
+def benchmark_backends(audio_files: Sequence[str], backends: Sequence[str]) -> List[Dict[str, Any]]:
+    """Bu makinedeki ASR motorlarının yükleme süresini ve RTF değerini karşılaştırır."""
+    from modules.transcriber import Transcriber, MODEL_CACHE
+
+    segments = load_segments(audio_files)
+    rows = []
+    for backend in backends:
+        row = {"config": backend}
+        transcriber = Transcriber(backend=backend)
+        try:
+            start_time = time.time()
+            transcriber.load_model()
+            row["load_seconds"] = round(time.time() - start_time, 2)
+            row["text"] = transcriber.transcribe_segments(segments)
+            row.update(transcriber.last_run_stats)
+        except Exception as e:
+            logger.error(f"{backend} ölçümü başarısız: {e}")
+            row["error"] = str(e)
+        finally:
+            transcriber.cleanup()
+            MODEL_CACHE.evict("ölçüm")
+        rows.append(row)
+
+    baseline = next((row for row in rows if row.get("rtf")), None)
+    for row in rows:
+        if baseline and row.get("rtf"):
+            row["speedup"] = round(baseline["rtf"] / row["rtf"], 2)
+    return rows
+
+def script_imports(script_path: str) -> Tuple[List[str], List[str]]:
+    """Betiğin modül düzeyindeki ve iş sırasında (gömülü bloklarda) içe aktardığı modülleri döndürür."""
+    with open(script_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    def imported_modules(node):
+        if isinstance(node, ast.Import):
+            return [alias.name for alias in node.names]
+        if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            return [node.module]
+        return []
+
+    top_level_nodes = set(map(id, tree.body))
+    top_level, deferred = [], []
+    for node in ast.walk(tree):
+        for module in imported_modules(node):
+            target = top_level if id(node) in top_level_nodes else deferred
+            if module not in top_level and module not in deferred:
+                target.append(module)
+    return top_level, deferred
+
+def measure_import_seconds(modules: Sequence[str], repeats: int = 3) -> float:
+    """Modülleri temiz bir yorumlayıcıda içe aktarma süresini ölçer; en iyi denemeyi döndürür."""
+    code = ("import time; start = time.perf_counter(); "
+            + "; ".join(f"import {module}" for module in modules)
+            + "; print(time.perf_counter() - start)")
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        seconds = float(result.stdout.strip().splitlines()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return round(best, 3)
+
+def benchmark_import_times(script_path: str = os.path.join(PROJECT_ROOT, "app.py")) -> List[Dict[str, Any]]:
+    """Uygulama açılışında ödenen içe aktarma süresini, ertelenen modüller üstte olsaydı ödenecek süreyle karşılaştırır."""
+    top_level, deferred = script_imports(script_path)
+    measurements = [("açılış: modül düzeyi içe aktarmalar", top_level),
+                    ("tümü üstte (erteleme öncesi)", top_level + deferred)]
+    measurements += [(f"iş başında: {module}", [module]) for module in deferred]
+
+    rows = []
+    for label, modules in measurements:
+        row = {"config": label, "modules": len(modules)}
+        try:
+            row["import_seconds"] = measure_import_seconds(modules)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.error(f"{label} ölçümü başarısız: {e}")
+            # Alt süreç hatasında traceback'in son satırı (ör. eksik bağımlılık) yeterlidir
+            row["error"] = (str(getattr(e, "stderr", "") or e).strip().splitlines() or [""])[-1]
+        rows.append(row)
+
+    baseline = rows[1].get("import_seconds")
+    for row in rows[:2]:
+        if baseline and row.get("import_seconds"):
+            row["speedup"] = round(baseline / row["import_seconds"], 2)
+    return rows
+
+def format_report(title: str, rows: List[Dict[str, Any]], columns: Sequence[str]) -> str:
+    """Ölçüm satırlarını Markdown tablosu olarak biçimlendirir."""
+    lines = [f"# {title}", "", "| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for row in rows:
+        if "error" in row:
+            cells = [str(row.get("config", ""))] + ["-"] * (len(columns) - 2) + [f"hata: {row['error'][:60]}"]
+        else:
+            cells = [str(row.get(column, "")) for column in columns]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+def write_report(name: str, report: str) -> str:
+    path = os.path.join(RESULT_DIR, f"benchmark_{name}_{get_timestamp()}.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report)
+    return path
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="S2T2S performans ölçümleri")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    cpu_parser = subparsers.add_parser("cpu", help="CPU hassasiyet modlarının RTF karşılaştırması")
+    cpu_parser.add_argument("audio_files", nargs="+")
+
+    shards_parser = subparsers.add_parser("shards", help="Çok süreçli CPU transkripsiyonunun ölçeklenmesi")
+    shards_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    shards_parser.add_argument("audio_files", nargs="+")
+
+    subparsers.add_parser("imports", help="Uygulama açılışındaki içe aktarma süreleri")
+
+    assisted_parser = subparsers.add_parser("assisted", help="Taslak modelli yardımlı çözmenin hız ve metin karşılaştırması")
+    assisted_parser.add_argument("audio_files", nargs="+")
+
+    backends_parser = subparsers.add_parser("backends", help="ASR motorlarının RTF karşılaştırması")
+    backends_parser.add_argument("--backends", nargs="+", default=["hf", "ct2"])
+    backends_parser.add_argument("audio_files", nargs="+")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.command == "cpu":
+        rows = benchmark_cpu_precisions(args.audio_files)
+        report = format_report(
+            "CPU transkripsiyon karşılaştırması",
+            rows,
+            ["config", "load_seconds", "audio_seconds", "elapsed_seconds", "rtf", "speedup", "same_text"],
+        )
+        path = write_report("cpu", report)
+    elif args.command == "shards":
+        rows = benchmark_shard_scaling(args.audio_files, args.workers)
+        report = format_report(
+            "Çok süreçli CPU transkripsiyon ölçeklenmesi",
+            rows,
+            ["config", "load_seconds", "audio_seconds", "elapsed_seconds", "throughput", "speedup", "same_text"],
+        )
+        path = write_report("shards", report)
+    elif args.command == "imports":
+        rows = benchmark_import_times()
+        report = format_report("Uygulama açılışı içe aktarma süreleri", rows,
+                               ["config", "modules", "import_seconds", "speedup"])
+        path = write_report("imports", report)
+    elif args.command == "assisted":
+        rows = benchmark_assisted_decoding(args.audio_files)
+        report = format_report(
+            "Yardımlı çözme karşılaştırması",
+            rows,
+            ["config", "language", "load_seconds", "audio_seconds", "elapsed_seconds", "rtf", "speedup", "same_text"],
+        )
+        path = write_report("assisted", report)
+    elif args.command == "backends":
+        rows = benchmark_backends(args.audio_files, args.backends)
+        report = format_report(
+            "ASR motoru karşılaştırması",
+            rows,
+            ["config", "load_seconds", "audio_seconds", "elapsed_seconds", "rtf", "speedup"],
+        )
+        path = write_report("backends", report)
+
+    print(report)
+    print(f"Rapor kaydedildi: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import (TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB, LLM_CACHE_DIR, LLM_CACHE_MAX_MB,
+                    LLM_CACHE_MEMORY_ENTRIES)
+from modules.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_BYTES = 4 * 1024 * 1024
+
+def hash_file(path: str) -> str:
+    """Dosya içeriğinin BLAKE2b özetini blok blok okuyarak hesaplar."""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_BYTES)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def make_key(*parts: Any) -> str:
+    """Verilen parçalardan (sözlükler dahil) kararlı bir önbellek anahtarı üretir."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Değerleri JSON dosyaları olarak saklayan, toplam boyutu sınırlı LRU disk önbelleği.
+
+    Son kullanım zamanı dosyanın mtime değeri ile tutulur; sınır aşıldığında en eski
+    kullanılan kayıtlar silinir. Toplam boyut açılışta bir kez taranıp yazmalarla güncellenir;
+    dizin yalnızca sınır aşıldığında yeniden taranır. Yazmalar atomik olduğundan aynı dizin
+    birden fazla süreç tarafından paylaşılabilir; diğer süreçlerin yazmaları bu tarama
+    sırasında hesaba katılır.
+    """
+
+    # Taşmada sınırın biraz altına inilir; böylece sınırdaki her yazma yeni bir tarama başlatmaz
+    EVICT_TARGET_RATIO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Dizindeki kayıtları (mtime, boyut, yol) olarak döndürür."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            new_size = os.path.getsize(tmp_path)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Önbellek kaydı yazılamadı ({key}): {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._size += new_size - old_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self) -> int:
+        """Toplam boyut sınırı aşıldıysa en uzun süredir kullanılmayan kayıtları sınırın altına inene kadar siler."""
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * self.EVICT_TARGET_RATIO if total > self.max_bytes else self.max_bytes
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    continue
+            self._size = total
+
+        if removed:
+            logger.info(f"Önbellekten {removed} kayıt silindi: {self.directory}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class TranscriptCache:
+    """Çözülmüş ses özeti, Whisper modeli ve çözme parametreleriyle anahtarlanan transkripsiyon önbelleği."""
+
+    def __init__(self, cache: Optional[DiskCache] = None):
+        self.cache = cache or DiskCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+
+    @staticmethod
+    def make_key(audio_hash: str, decoding_params: Dict[str, Any]) -> str:
+        return make_key("transcript", audio_hash, decoding_params)
+
+    def get(self, key: str) -> Optional[Transcript]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        logger.info(f"Transkripsiyon önbellekte bulundu: {key[:12]}")
+        if "transcript" in entry:
+            return Transcript.from_dict(entry["transcript"])
+        return Transcript.from_text(entry.get("transcription", ""))
+
+    def put(self, keys: Iterable[str], transcript: Transcript) -> None:
+        """Transkripsiyonu verilen tüm anahtarlar (yükleme ve ses özeti) altında saklar."""
+        entry = {"transcript": transcript.to_dict()}
+        for key in keys:
+            self.cache.set(key, entry)
+
+
+class LLMCache:
+    """Model yanıtlarını bellekte ve diskte tutan iki katmanlı önbellek.
+
+    Anahtar model adı, boşlukları normalize edilmiş istemin özeti ve üretim parametrelerinden
+    oluşur. Bellek katmanı sınırlı sayıda kaydı LRU sırasıyla tutar; disk katmanı süreçler ve
+    yeniden başlatmalar arasında paylaşılır ve toplam boyutu DiskCache ile sınırlanır.
+    """
+
+    def __init__(self, cache: Optional[DiskCache] = None, memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.cache = cache or DiskCache(LLM_CACHE_DIR, LLM_CACHE_MAX_MB * 1024 * 1024)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        return re.sub(r"\s+", " ", prompt).strip()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Dict[str, Any]) -> str:
+        prompt_hash = hashlib.sha256(LLMCache.normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return make_key("llm", model, prompt_hash, options)
+
+    def _remember(self, key: str, response: str) -> None:
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return response
+
+        entry = self.cache.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry["response"])
+        return entry["response"]
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._remember(key, response)
+        self.cache.set(key, {"response": response})
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "memory_entries": len(self._memory)}
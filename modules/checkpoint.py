@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from config import CHECKPOINT_DIR, CHECKPOINT_MAX_AGE_HOURS
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionCheckpoint:
+    """Tamamlanan segment sonuçlarını iş sürerken diske yazan kontrol noktası.
+
+    Kayıtlar ses özeti ve çözme parametrelerinden türetilen anahtarla adlandırılan bir JSONL
+    dosyasına eklenir; segmentler (ofset, süre) ile tanınır. Süreç ölür veya iş durdurulursa
+    aynı dosyayla yeniden başlatılan iş tamamlanmış segmentleri atlar.
+    """
+
+    def __init__(self, key: str, directory: str = CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.key = key
+        self.path = os.path.join(directory, f"{key}.jsonl")
+        self._results: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._load()
+
+    @staticmethod
+    def segment_key(offset_ms: int, duration_s: float) -> Tuple[int, int]:
+        return int(offset_ms), int(round(duration_s * 1000))
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Yazılırken kesilen son satır
+                    continue
+                self._results[(record["offset_ms"], record["duration_ms"])] = record
+        if self._results:
+            logger.info(f"Kontrol noktası yüklendi: {len(self._results)} tamamlanmış segment ({self.key[:12]})")
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, offset_ms: int, duration_s: float) -> Optional[Dict[str, Any]]:
+        """Segment daha önce tamamlandıysa kaydedilen sonucunu döndürür."""
+        return self._results.get(self.segment_key(offset_ms, duration_s))
+
+    def record(self, offset_ms: int, duration_s: float, text: str, chunks) -> None:
+        """Tamamlanan segmenti kalıcı olarak dosyaya ekler."""
+        offset_ms, duration_ms = self.segment_key(offset_ms, duration_s)
+        record = {
+            "offset_ms": offset_ms,
+            "duration_ms": duration_ms,
+            "text": text,
+            "chunks": [list(chunk) for chunk in chunks],
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._results[(offset_ms, duration_ms)] = record
+
+    def remove(self) -> None:
+        """İş başarıyla bittiğinde kontrol noktasını siler."""
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Kontrol noktası silinemedi: {e}")
+
+    @staticmethod
+    def cleanup_stale(directory: str = CHECKPOINT_DIR, max_age_hours: float = CHECKPOINT_MAX_AGE_HOURS) -> int:
+        """Uzun süredir devam ettirilmeyen kontrol noktalarını siler."""
+        removed = 0
+        cutoff = time.time() - max_age_hours * 3600
+        for entry in os.scandir(directory):
+            try:
+                if entry.name.endswith(".jsonl") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"{entry.path} temizlenirken hata: {e}")
+        return removed
@@ -23,7 +23,18 @@ LANGUAGES = {
         "audio_converting": "🔄 Ses dosyası dönüştürülüyor...",
         "audio_splitting": "✂️ Ses dosyası parçalara bölünüyor...",
         "transcribing": "🎤 Transkripsiyon yapılıyor...",
+        "transcript_cached": "⚡ Bu ses daha önce işlenmiş, transkripsiyon önbellekten alındı",
         "transcribing_segment": "🎤 Transkripsiyon: Segment {}/{}",
+        "transcribing_progress": "🎤 Transkripsiyon: Segment {}/{} — {:.0f}/{:.0f} sn ses, {:.1f}x gerçek zamanlı",
+        "partial_transcription": "Şu ana kadarki transkripsiyon",
+        "partial_summary": "Oluşturulan özet",
+        "audio_language": "Kayıt dili",
+        "audio_language_help": "Otomatik algılamada dil ilk konuşmadan bir kez belirlenir ve tüm iş boyunca kullanılır",
+        "audio_language_auto": "Otomatik algıla",
+        "audio_language_tr": "Türkçe",
+        "audio_language_en": "İngilizce",
+        "transcription_resumed": "↩️ Yarım kalan transkripsiyon sürdürülüyor: {} segment zaten tamamlanmış",
+        "transcription_incomplete": "⚠️ {} segment transkribe edilemedi. Sonuç önbelleğe alınmadı; aynı dosya yeniden işlendiğinde kontrol noktasından devam edilecek.",
         "summarizing": "📝 Metin özetleniyor (bu işlem biraz sürebilir)...",
         "summarizing_model": "🧠 {} modeli ile kapsamlı özet oluşturuluyor...",
         "summary_success": "✅ Özet başarıyla oluşturuldu!",
@@ -49,6 +60,8 @@ LANGUAGES = {
         "transcription_header": "Transkripsiyon",
         "transcription_info": "Aşağıda ses dosyasının transkripsiyon metni yer almaktadır.",
         "download_transcription_button": "📥 Transkripsiyonu İndir",
+        "download_srt_button": "📥 Altyazı (SRT)",
+        "download_vtt_button": "📥 Altyazı (VTT)",
         "transcription_downloaded": "Transkripsiyon başarıyla indirildi!",
         "saved_files_header": "Kaydedilen Dosyalar",
         "transcription_file": "📄 Transkripsiyon Dosyası",
@@ -88,7 +101,18 @@ LANGUAGES = {
         "audio_converting": "🔄 Converting audio file...",
         "audio_splitting": "✂️ Splitting audio file into segments...",
         "transcribing": "🎤 Transcribing...",
+        "transcript_cached": "⚡ This audio was processed before, transcription loaded from cache",
         "transcribing_segment": "🎤 Transcription: Processing segment {}/{}",
+        "transcribing_progress": "🎤 Transcription: segment {}/{} — {:.0f}/{:.0f} s of audio, {:.1f}x real time",
+        "partial_transcription": "Transcription so far",
+        "partial_summary": "Summary in progress",
+        "audio_language": "Audio language",
+        "audio_language_help": "With automatic detection the language is identified once from the first speech and used for the whole job",
+        "audio_language_auto": "Detect automatically",
+        "audio_language_tr": "Turkish",
+        "audio_language_en": "English",
+        "transcription_resumed": "↩️ Resuming an interrupted transcription: {} segments already completed",
+        "transcription_incomplete": "⚠️ {} segments could not be transcribed. The result was not cached; processing the same file again will resume from the checkpoint.",
         "summarizing": "📝 Summarizing text (this may take a while)...",
         "summarizing_model": "🧠 Creating comprehensive summary with {} model...",
         "summary_success": "✅ Summary successfully created!",
@@ -114,6 +138,8 @@ LANGUAGES = {
         "transcription_header": "Transcription",
         "transcription_info": "Below is the transcription text of the audio file.",
         "download_transcription_button": "📥 Download Transcription",
+        "download_srt_button": "📥 Subtitles (SRT)",
+        "download_vtt_button": "📥 Subtitles (VTT)",
         "transcription_downloaded": "Transcription downloaded successfully!",
         "saved_files_header": "Saved Files",
         "transcription_file": "📄 Transcription File",
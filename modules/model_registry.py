@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from config import OLLAMA_REGISTRY_TTL_S, OLLAMA_REGISTRY_RETRY_S
+from modules.ollama_client import OLLAMA_CLIENT, OllamaClient, OllamaError
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Ollama sunucusundaki indirilmiş ve belleğe yüklü modellerin TTL'li önbelleği.
+
+    İlk sorgu sunucuyu eşzamanlı olarak sorgular; sonraki sorgular önbellekten yanıtlanır. Süresi
+    dolan kayıt beklenmeden döndürülür ve arka planda tek bir iş parçacığıyla yenilenir. Sunucuya
+    ulaşılamadığında sonuç daha kısa süre (OLLAMA_REGISTRY_RETRY_S) saklanır.
+    """
+
+    def __init__(self, client: OllamaClient = OLLAMA_CLIENT, ttl: float = OLLAMA_REGISTRY_TTL_S,
+                 retry_after: float = OLLAMA_REGISTRY_RETRY_S):
+        self.client = client
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._available = False
+        self._refreshed_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical_name(name: str) -> str:
+        # Ollama etiketsiz model adlarını ":latest" olarak saklar
+        return name if ":" in name else f"{name}:latest"
+
+    def refresh(self) -> bool:
+        """Model listesini sunucudan eşzamanlı olarak yeniler; sunucuya ulaşılabiliyorsa True döndürür."""
+        try:
+            installed = self.client.list_models()
+            running = {model.get("name") for model in self.client.running_models()}
+            models = {
+                model["name"]: {
+                    "size": model.get("size", 0),
+                    "loaded": model["name"] in running,
+                    "details": model.get("details", {}),
+                }
+                for model in installed if model.get("name")
+            }
+            available = True
+        except OllamaError as e:
+            logger.warning(f"Ollama model listesi alınamadı: {e}")
+            models, available = {}, False
+
+        with self._lock:
+            self._models = models
+            self._available = available
+            self._refreshed_at = time.monotonic()
+            self._refreshing = False
+        logger.info(f"Ollama model kaydı yenilendi: {len(models)} model, "
+                    f"{sum(1 for info in models.values() if info['loaded'])} tanesi bellekte")
+        return available
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._refreshed_at = None
+
+    def _current(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            refreshed_at = self._refreshed_at
+            if refreshed_at is not None:
+                max_age = self.ttl if self._available else self.retry_after
+                if time.monotonic() - refreshed_at > max_age and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self.refresh, name="model-registry", daemon=True).start()
+                return self._models
+
+        self.refresh()
+        with self._lock:
+            return self._models
+
+    def is_available(self) -> bool:
+        self._current()
+        return self._available
+
+    def models(self) -> Dict[str, Dict[str, Any]]:
+        """Model adı -> {"size": bayt, "loaded": bellekte mi, "details": ...} eşlemesinin kopyasını döndürür."""
+        return dict(self._current())
+
+    def model_info(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._current().get(self.canonical_name(name))
+
+    def has_model(self, name: str) -> bool:
+        return self.model_info(name) is not None
+
+    def is_loaded(self, name: str) -> bool:
+        info = self.model_info(name)
+        return bool(info and info["loaded"])
+
+    def ensure_model(self, name: str, pull_timeout: float = 300) -> bool:
+        """Model yoksa indirir; indirme bitene kadar bekler. Karar yollarında değil, kurulumda kullanılmalıdır."""
+        if self.has_model(name):
+            return True
+        if not self.is_available():
+            return False
+        logger.warning(f"{name} modeli yüklü değil, indiriliyor...")
+        try:
+            self.client.pull(name, timeout=pull_timeout)
+        except (OllamaError, TimeoutError) as e:
+            logger.error(f"Model yükleme hatası: {e}")
+            return False
+        self.refresh()
+        return self.has_model(name)
+
+
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,245 @@
+import http.client
+import json
+import logging
+import queue
+import select
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+from config import OLLAMA_HOST, OLLAMA_POOL_SIZE, OLLAMA_CONNECT_TIMEOUT, OLLAMA_KEEP_ALIVE, OLLAMA_CANCEL_POLL_S
+
+logger = logging.getLogger(__name__)
+
+class OllamaError(RuntimeError):
+    """Ollama sunucusu hata döndürdüğünde veya ulaşılamadığında yükselir."""
+
+
+class OllamaCancelled(OllamaError):
+    """Üretim cancel ile iptal edildiğinde yükselir."""
+
+
+class OllamaClient:
+    """Yerel Ollama REST API'si için kalıcı bağlantı havuzlu HTTP istemcisi.
+
+    Her çağrı için yeni bir `ollama run` süreci başlatmak yerine aynı sunucuya açık tutulan
+    bağlantılar yeniden kullanılır. Üretim her zaman akış (NDJSON) olarak okunur; böylece
+    parçalar arasında zaman aşımı ve iptal kontrol edilir, iptal edilen isteğin bağlantısı
+    kapatılarak sunucunun üretimi bırakması sağlanır.
+    """
+
+    def __init__(self, host: str = OLLAMA_HOST, pool_size: int = OLLAMA_POOL_SIZE,
+                 connect_timeout: float = OLLAMA_CONNECT_TIMEOUT, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        url = urlparse(host if "://" in host else f"http://{host}")
+        self.scheme = url.scheme
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or (443 if url.scheme == "https" else 11434)
+        self.connect_timeout = connect_timeout
+        self.keep_alive = keep_alive
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.connect_timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        """Havuzdaki tüm bağlantıları kapatır."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _wait_readable(connection: http.client.HTTPConnection, cancel_event: threading.Event, timeout: float) -> bool:
+        """Yanıtın ilk baytı gelene kadar soketi kısa aralıklarla yoklar; iptal edilirse False döndürür.
+
+        Sunucu ilk parçayı model yüklenip istem işlendikten sonra gönderir; getresponse bu süre
+        boyunca bloklayacağından iptal ancak bu yoklamayla fark edilir.
+        """
+        deadline = time.monotonic() + timeout
+        while not cancel_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout()
+            readable, _, _ = select.select([connection.sock], [], [], min(remaining, OLLAMA_CANCEL_POLL_S))
+            if readable:
+                return True
+        return False
+
+    def _open(self, method: str, path: str, payload: Optional[Dict[str, Any]], read_timeout: float,
+              cancel_event: Optional[threading.Event] = None):
+        """İsteği gönderir ve (bağlantı, yanıt) döndürür; havuzdan gelen bayat bağlantıda bir kez yeniden dener.
+
+        cancel_event verilirse ilk yanıt beklenirken ayarlanması bağlantıyı kapatır ve OllamaCancelled yükseltir.
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            connection = self._acquire()
+            if connection.sock is None:
+                # Bağlantı kurulumu connect_timeout ile sınırlanır; okuma zaman aşımı soket açıldıktan sonra ayarlanır
+                connection.timeout = self.connect_timeout
+                try:
+                    connection.connect()
+                except OSError as e:
+                    connection.close()
+                    raise OllamaError(f"Ollama sunucusuna ulaşılamadı ({self.host}:{self.port}): {e}") from e
+            connection.timeout = read_timeout
+            try:
+                connection.sock.settimeout(read_timeout)
+                connection.request(method, path, body=body, headers=headers)
+                if cancel_event is not None and not self._wait_readable(connection, cancel_event, read_timeout):
+                    connection.close()
+                    raise OllamaCancelled(f"Ollama isteği yanıt beklenirken iptal edildi: {path}")
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                connection.close()
+                if attempt == 0:
+                    continue
+                raise OllamaError(f"Ollama bağlantısı koptu: {e}") from e
+            except socket.timeout:
+                connection.close()
+                raise TimeoutError(f"Ollama {read_timeout:.0f} saniye içinde yanıt vermedi")
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise OllamaError(f"Ollama sunucusuna ulaşılamadı ({self.host}:{self.port}): {e}") from e
+
+            if response.status >= 400:
+                detail = response.read().decode("utf-8", errors="replace")
+                self._release(connection)
+                try:
+                    detail = json.loads(detail).get("error", detail)
+                except ValueError:
+                    pass
+                raise OllamaError(f"Ollama hatası (HTTP {response.status}): {detail}")
+            return connection, response
+        raise OllamaError("Ollama isteği gönderilemedi")
+
+    def _request_json(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                      timeout: float = 30) -> Dict[str, Any]:
+        connection, response = self._open(method, path, payload, timeout)
+        try:
+            data = json.loads(response.read().decode("utf-8") or "{}")
+        except (OSError, ValueError) as e:
+            connection.close()
+            raise OllamaError(f"Ollama yanıtı okunamadı: {e}") from e
+        self._release(connection)
+        return data
+
+    def stream_generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                        timeout: float = 300, cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """/api/generate akışındaki parçaları geldikçe döndürür; son parça zamanlama alanlarını içerir.
+
+        timeout tüm üretimin süresidir. cancel_event ayarlanırsa bağlantı kapatılır ve OllamaCancelled
+        yükselir; istek gönderilmeden önce ayarlanmışsa sunucuya hiç istek gitmez.
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            raise OllamaCancelled(f"'{model}' üretimi iptal edildi")
+        payload = {"model": model, "prompt": prompt, "stream": True, "keep_alive": self.keep_alive}
+        if options:
+            payload["options"] = options
+
+        deadline = time.monotonic() + timeout
+        connection, response = self._open("POST", "/api/generate", payload, timeout, cancel_event)
+        finished = False
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OllamaCancelled(f"'{model}' üretimi iptal edildi")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"İşlem {timeout} saniye içinde tamamlanamadı")
+                if connection.sock is not None:
+                    connection.sock.settimeout(remaining)
+                try:
+                    line = response.readline()
+                except socket.timeout:
+                    raise TimeoutError(f"İşlem {timeout} saniye içinde tamamlanamadı")
+                if not line:
+                    raise OllamaError(f"'{model}' akışı tamamlanmadan kesildi")
+                if not line.strip():
+                    continue
+
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    raise OllamaError(f"Ollama akışı çözümlenemedi: {e}") from e
+                if chunk.get("error"):
+                    raise OllamaError(f"Ollama hatası: {chunk['error']}")
+                yield chunk
+                if chunk.get("done"):
+                    # Parçalı aktarımın sonlandırıcısı okunmadan bağlantı yeniden kullanılamaz
+                    response.read()
+                    finished = True
+                    return
+        finally:
+            if finished:
+                self._release(connection)
+            else:
+                # Okunmamış akış varken bağlantı yeniden kullanılamaz; kapatmak üretimi de durdurur
+                connection.close()
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                 timeout: float = 300, cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Üretimi tamamlar; tam metni "response" alanında, sunucu zamanlama alanlarıyla birlikte döndürür."""
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        for chunk in self.stream_generate(model, prompt, options, timeout, cancel_event):
+            parts.append(chunk.get("response", ""))
+            final = chunk
+        result = dict(final)
+        result["response"] = "".join(parts)
+        return result
+
+    @staticmethod
+    def timing_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Sunucunun nanosaniye zamanlama alanlarını saniye ve token/sn değerlerine çevirir."""
+        def seconds(field):
+            return round(result.get(field, 0) / 1e9, 2)
+
+        eval_seconds = result.get("eval_duration", 0) / 1e9
+        return {
+            "total_s": seconds("total_duration"),
+            "load_s": seconds("load_duration"),
+            "prompt_tokens": result.get("prompt_eval_count", 0),
+            "prompt_eval_s": seconds("prompt_eval_duration"),
+            "output_tokens": result.get("eval_count", 0),
+            "eval_s": round(eval_seconds, 2),
+            "tokens_per_s": round(result.get("eval_count", 0) / eval_seconds, 1) if eval_seconds else None,
+        }
+
+    def list_models(self, timeout: float = 10) -> List[Dict[str, Any]]:
+        """Sunucuda indirilmiş modelleri (/api/tags) döndürür."""
+        return self._request_json("GET", "/api/tags", timeout=timeout).get("models", [])
+
+    def running_models(self, timeout: float = 10) -> List[Dict[str, Any]]:
+        """Belleğe yüklü modelleri (/api/ps) döndürür."""
+        return self._request_json("GET", "/api/ps", timeout=timeout).get("models", [])
+
+    def pull(self, model: str, timeout: float = 300) -> None:
+        """Modeli indirir ve indirme bitene kadar bekler."""
+        self._request_json("POST", "/api/pull", {"model": model, "stream": False}, timeout=timeout)
+
+    def is_available(self, timeout: float = 5) -> bool:
+        try:
+            self._request_json("GET", "/api/version", timeout=timeout)
+            return True
+        except OllamaError:
+            return False
+
+
+OLLAMA_CLIENT = OllamaClient()
@@ -0,0 +1,127 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from config import RETRIEVAL_WINDOW_SENTENCES, RETRIEVAL_WINDOW_STRIDE, RETRIEVAL_TOP_K, RETRIEVAL_MAX_TOKENS
+from modules.text_chunker import TextChunker, TokenCounter
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    'tr': {'ve', 'veya', 'ile', 'bir', 'bu', 'şu', 'o', 'da', 'de', 'ki', 'mi', 'için', 'gibi', 'çok', 'daha',
+           'ama', 'fakat', 'ise', 'olarak', 'olan', 'olur', 'var', 'yok', 'her', 'ne', 'nasıl', 'neden',
+           'kadar', 'sonra', 'önce', 'yani', 'şey', 'biz', 'ben', 'sen', 'siz', 'onlar', 'bunu', 'şimdi'},
+    'en': {'the', 'and', 'or', 'for', 'with', 'this', 'that', 'what', 'where', 'when', 'how', 'which', 'a',
+           'an', 'of', 'to', 'in', 'on', 'is', 'are', 'was', 'were', 'be', 'it', 'as', 'at', 'by', 'from',
+           'so', 'we', 'you', 'they', 'there', 'here', 'about', 'into', 'can', 'will'},
+}
+
+# Whisper aynı kelimeyi farklı oturumlarda şapkalı/şapkasız yazabildiğinden Türkçe harfler katlanır
+TURKISH_FOLD = str.maketrans({'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u', 'â': 'a', 'î': 'i', 'û': 'u'})
+TOKEN_PATTERN = re.compile(r'\w+')
+FOLDED_STOPWORDS = {lang: {word.translate(TURKISH_FOLD) for word in words} for lang, words in STOPWORDS.items()}
+
+class TranscriptIndex:
+    """Transkriptin cümle pencereleri üzerinde BM25 puanlamalı ters dizin.
+
+    Bir iş için bir kez oluşturulur; her bölüm sorgusu dizin üzerinden yalnızca sorgu
+    terimlerini içeren pencereleri puanlar, metni yeniden taramaz.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, text: str, lang: Optional[str] = None,
+                 window_sentences: int = RETRIEVAL_WINDOW_SENTENCES, stride: int = RETRIEVAL_WINDOW_STRIDE,
+                 max_tokens: int = RETRIEVAL_MAX_TOKENS):
+        self.lang = lang
+        # Noktalamasız transkriptte tek "cümle" bütçeyi aşabilir; bir pencerenin bütçeye sığması için
+        # her cümle bütçenin pencere başına düşen payıyla sınırlanır
+        sentences = TextChunker.split_units(text, max(1, max_tokens // window_sentences), lang)
+        self.windows: List[Tuple[int, int]] = []
+        self.sentences = sentences
+        for start in range(0, max(1, len(sentences) - window_sentences + stride), stride):
+            end = min(start + window_sentences, len(sentences))
+            if start < end:
+                self.windows.append((start, end))
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for window_id, (start, end) in enumerate(self.windows):
+            terms = self.analyze(" ".join(sentences[start:end]), lang)
+            self.lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((window_id, frequency))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        logger.info(f"Transkript dizini oluşturuldu: {len(sentences)} cümle, {len(self.windows)} pencere, "
+                    f"{len(self.postings)} terim")
+
+    @staticmethod
+    def normalize(word: str, lang: Optional[str]) -> str:
+        if lang == 'tr':
+            # str.lower 'I' harfini 'i', 'İ' harfini 'i̇' yapar; Türkçede doğrusu 'ı' ve 'i'
+            word = word.replace('I', 'ı').replace('İ', 'i')
+        return word.lower().translate(TURKISH_FOLD)
+
+    @staticmethod
+    def stem(word: str, lang: Optional[str]) -> str:
+        if lang == 'tr':
+            # Eklemeli Türkçede ilk beş harfle kırpma, ek çözümlemesine yakın geri getirme sağlar
+            return word[:5]
+        for suffix in ('ing', 'ed', 'es', 's'):
+            if len(word) > len(suffix) + 3 and word.endswith(suffix):
+                return word[:-len(suffix)]
+        return word
+
+    @staticmethod
+    def analyze(text: str, lang: Optional[str]) -> List[str]:
+        stopwords = FOLDED_STOPWORDS.get(lang, FOLDED_STOPWORDS['tr'] | FOLDED_STOPWORDS['en'])
+        terms = []
+        for word in TOKEN_PATTERN.findall(text):
+            word = TranscriptIndex.normalize(word, lang)
+            if len(word) < 2 or word in stopwords:
+                continue
+            terms.append(TranscriptIndex.stem(word, lang))
+        return terms
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Tuple[int, float]]:
+        """Sorguya en uygun pencereleri (pencere no, BM25 puanı) olarak azalan puanla döndürür."""
+        if not self.windows:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        window_count = len(self.windows)
+        for term in set(self.analyze(query, self.lang)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (window_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for window_id, frequency in postings:
+                length_norm = 1 - self.B + self.B * self.lengths[window_id] / (self.average_length or 1)
+                scores[window_id] += idf * frequency * (self.K1 + 1) / (frequency + self.K1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def relevant_text(self, query: str, top_k: int = RETRIEVAL_TOP_K, max_tokens: int = RETRIEVAL_MAX_TOKENS) -> str:
+        """En uygun pencereleri token bütçesi içinde, transkriptteki sıralarıyla birleştirip döndürür.
+
+        Örtüşen pencerelerin ortak cümleleri bir kez yazılır.
+        """
+        selected = set()
+        used_tokens = 0
+        for window_id, _ in self.search(query, top_k):
+            start, end = self.windows[window_id]
+            new_sentences = [i for i in range(start, end) if i not in selected]
+            tokens = sum(TokenCounter.count(self.sentences[i], self.lang) for i in new_sentences)
+            if used_tokens + tokens > max_tokens:
+                continue
+            selected.update(new_sentences)
+            used_tokens += tokens
+
+        passages: List[List[str]] = []
+        previous = None
+        for i in sorted(selected):
+            if previous is None or i != previous + 1:
+                passages.append([])
+            passages[-1].append(self.sentences[i])
+            previous = i
+        return "\n\n".join(" ".join(passage) for passage in passages)
@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+from config import (WHISPER_CPU_DTYPE, WHISPER_CPU_QUANTIZE, WHISPER_SHARD_WORKERS, WHISPER_SHARD_THREADS,
+                    WHISPER_LANGUAGE, WHISPER_BACKEND, WHISPER_ASSISTED_DECODING)
+from modules.transcriber import Transcriber, WhisperModelCache
+
+logger = logging.getLogger(__name__)
+
+# Her çalışan süreçteki model kopyası
+_worker_transcriber: Optional[Transcriber] = None
+
+def _init_worker(backend: str, cpu_dtype: str, cpu_quantize: bool, threads: int, assisted: bool) -> None:
+    global _worker_transcriber
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    _worker_transcriber = Transcriber(device="cpu", cpu_dtype=cpu_dtype, cpu_quantize=cpu_quantize,
+                                      cpu_threads=threads, assisted=assisted, backend=backend)
+    # Paylaşılan önbellek ve denetleyicisi yalnızca ana süreçte anlamlıdır
+    _worker_transcriber.model = _worker_transcriber._build_backend()
+    logger.info(f"Whisper çalışan süreci hazır (pid {os.getpid()}, {threads} iş parçacığı)")
+
+def _worker_ready(_: int) -> int:
+    return os.getpid()
+
+def _detect_language_in_worker(segment: Union[str, np.ndarray]) -> Optional[str]:
+    return _worker_transcriber.detect_language(segment)
+
+def _transcribe_in_worker(segment: Union[str, np.ndarray], language: Optional[str]) -> Dict[str, Any]:
+    _worker_transcriber.language = language
+    return _worker_transcriber._transcribe_single(segment)
+
+
+class WorkerPool(ProcessPoolExecutor):
+    """Önbellekten atıldığında çalışan süreçlerini kapatan süreç havuzu."""
+
+    def close(self) -> None:
+        self.shutdown(wait=True, cancel_futures=True)
+        logger.info("Whisper çalışan süreçleri kapatıldı")
+
+
+# Çalışan süreçler ve model kopyaları işler arasında sıcak kalır; MODEL_CACHE ile aynı
+# boşta kalma ve bellek baskısı politikasıyla kapatılır
+POOL_CACHE = WhisperModelCache()
+
+class ShardedTranscriber(Transcriber):
+    """Segmentleri, her biri kendi model kopyasını tutan CPU süreçlerine dağıtan transkriptör.
+
+    Çok çekirdekli CPU sunucularda tek pipeline'ın iş parçacıkları çekirdekleri verimli
+    kullanamaz; burada çekirdekler süreçlere bölünür ve her süreç sabit sayıda iş parçacığıyla
+    ayrı segmentler üzerinde çalışır. Sonuçlar segment sırasıyla birleştirilir, böylece
+    ilerleme, kontrol noktası ve Transcript oluşturma Transcriber ile aynı kalır.
+    """
+
+    def __init__(self, workers: int = WHISPER_SHARD_WORKERS, threads_per_worker: Optional[int] = WHISPER_SHARD_THREADS,
+                 cpu_dtype: str = WHISPER_CPU_DTYPE, cpu_quantize: bool = WHISPER_CPU_QUANTIZE,
+                 language: Optional[str] = WHISPER_LANGUAGE, assisted: bool = WHISPER_ASSISTED_DECODING,
+                 backend: str = WHISPER_BACKEND):
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        super().__init__(device="cpu", cpu_dtype=cpu_dtype, cpu_quantize=cpu_quantize,
+                         cpu_threads=self.threads_per_worker, language=language, assisted=assisted, backend=backend)
+        self._pool = None
+        self._pool_broken = False
+
+    @staticmethod
+    def enabled() -> bool:
+        """Yapılandırmaya göre çok süreçli modun kullanılıp kullanılmayacağını döndürür."""
+        return WHISPER_SHARD_WORKERS > 1 and Transcriber.resolve_device() == "cpu"
+
+    def _pool_key(self) -> Tuple:
+        return self._model_key() + (self.workers, self.threads_per_worker)
+
+    def _start_pool(self) -> WorkerPool:
+        """Çalışan süreçleri başlatır ve hepsi modelini yükleyene kadar bekler."""
+        logger.info(f"{self.workers} Whisper çalışan süreci başlatılıyor "
+                    f"(süreç başına {self.threads_per_worker} iş parçacığı)")
+        # fork, PyTorch'un iş parçacığı havuzlarıyla güvenli değildir
+        pool = WorkerPool(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend_class.name, self.dtype, self.quantize, self.threads_per_worker, self.assisted),
+        )
+        try:
+            pids = set(pool.map(_worker_ready, range(self.workers)))
+        except Exception as e:
+            logger.error(f"Whisper çalışan süreçleri başlatılamadı: {e}")
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        logger.info(f"{len(pids)} Whisper çalışan süreci hazır")
+        return pool
+
+    def load_model(self) -> None:
+        """Sıcak çalışan süreç havuzunu paylaşılan önbellekten alır, gerekirse başlatır."""
+        if self._pool is not None:
+            return
+        self._pool = POOL_CACHE.acquire(self._pool_key(), self._start_pool)
+
+    def _submit(self, func, *args):
+        try:
+            return self._pool.submit(func, *args)
+        except BrokenProcessPool:
+            self._pool_broken = True
+            raise
+
+    @staticmethod
+    def _worker_payload(segment: Union[str, np.ndarray]) -> Union[str, np.ndarray]:
+        # Bellek eşlemli görünümler süreçler arası düz dizi olarak kopyalanır
+        return np.array(segment) if isinstance(segment, np.ndarray) else segment
+
+    def detect_language(self, segment: Union[str, np.ndarray]) -> Optional[str]:
+        """Dil tespitini çalışan süreçlerden birinde çalıştırır; sonuç tüm süreçlere iletilir."""
+        self.load_model()
+        try:
+            return self._submit(_detect_language_in_worker, self._worker_payload(segment)).result()
+        except BrokenProcessPool as e:
+            self._pool_broken = True
+            logger.warning(f"Dil tespiti başarısız, çalışan süreç çöktü: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Dil tespiti başarısız, dil her parçada ayrıca belirlenecek: {e}")
+            return None
+
+    def _iter_pipeline_outputs(self, segment_files: Iterable[Tuple[Union[str, np.ndarray], int, int]]
+                               ) -> Iterator[Tuple[Union[str, np.ndarray], int, int, Optional[Dict[str, Any]]]]:
+        """Segmentleri çalışan süreçlere dağıtır ve sonuçları giriş sırasıyla döndürür.
+
+        Bellekte bekleyen segment sayısını sınırlamak için aynı anda en fazla iki katı
+        çalışan sayısı kadar segment gönderilir.
+        """
+        self.load_model()
+        in_flight = deque()
+
+        def collect():
+            segment, idx, offset_ms, future = in_flight.popleft()
+            try:
+                output = future.result()
+            except BrokenProcessPool as e:
+                logger.error(f"Segment {idx+1} transkripsiyon hatası, çalışan süreç çöktü: {e}")
+                self._pool_broken = True
+                output = None
+            except Exception as e:
+                logger.error(f"Segment {idx+1} transkripsiyon hatası: {e}")
+                output = None
+            return segment, idx, offset_ms, output
+
+        for segment, idx, offset_ms in segment_files:
+            future = self._submit(_transcribe_in_worker, self._worker_payload(segment), self.language)
+            in_flight.append((segment, idx, offset_ms, future))
+            if len(in_flight) >= self.workers * 2:
+                yield collect()
+
+        while in_flight:
+            yield collect()
+
+    def cleanup(self) -> None:
+        """Havuzu paylaşılan önbelleğe bırakır; süreçler sıcak kalır, çökmüş havuz hemen kapatılır."""
+        if self._pool is not None:
+            self._pool = None
+            POOL_CACHE.release()
+            if self._pool_broken:
+                POOL_CACHE.evict("çalışan süreç çöktü")
+                self._pool_broken = False
+        logger.info(f"Whisper çalışan havuzu önbelleği: {POOL_CACHE.stats()}")
@@ -1,21 +1,89 @@
-import subprocess
 import logging
 import re
 import time
 import json
-from typing import List, Dict, Tuple, Optional
-from config import SUMMARY_CHUNK_SIZE, SUMMARY_MODEL_PRIMARY, SUMMARY_MODEL_FALLBACK, SUMMARY_TIMEOUT_BASIC,SUMMARY_TIMEOUT_ENHANCED, SUMMARY_FALLBACK_TIMEOUT
+import threading
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Dict, Tuple, Optional
+from config import SUMMARY_MODEL_PRIMARY, SUMMARY_MODEL_FALLBACK, SUMMARY_TIMEOUT_BASIC,SUMMARY_TIMEOUT_ENHANCED, SUMMARY_FALLBACK_TIMEOUT
+from config import OLLAMA_CANCEL_POLL_S, OLLAMA_NUM_PARALLEL, LLM_CACHE_ENABLED, MAX_INPUT_TOKENS, MAX_META_SUMMARY_TOKENS, OLLAMA_NUM_CTX
+from config import SUMMARY_PROMPT_RESERVE_TOKENS, SUMMARY_CHUNK_OVERLAP_TOKENS, SUMMARY_NUM_PREDICT
+from modules.cache import LLMCache
+from modules.ollama_client import OLLAMA_CLIENT, OllamaClient, OllamaCancelled
+from modules.model_registry import MODEL_REGISTRY
+from modules.task_graph import TaskGraph, parallel_map
+from modules.text_chunker import TextChunker, TokenCounter
+from modules.retrieval import TranscriptIndex
 
 logger = logging.getLogger(__name__)
 
+LLM_CACHE = LLMCache() if LLM_CACHE_ENABLED else None
+# Süren özet işinin iptal olayı; görev grafiği ve parallel_map bağlamı iş parçacıklarına kopyalar
+JOB_CANCEL_EVENT: ContextVar[Optional[threading.Event]] = ContextVar("job_cancel_event", default=None)
+
+class ThinkFilter:
+    """Akış halinde gelen model çıktısından <think>...</think> bloklarını parça parça ayıklar.
+
+    Etiketler token sınırlarında bölünebildiğinden, bir etiketin başlangıcı olabilecek son
+    karakterler bir sonraki parçaya kadar bekletilir.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._inside = False
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+
+    def feed(self, piece: str) -> str:
+        """Yeni parçayı ekler ve artık kesin olarak görünür olan metni döndürür."""
+        self._buffer += piece
+        visible = []
+        while self._buffer:
+            if self._inside:
+                end = self._buffer.find(self.CLOSE_TAG)
+                if end < 0:
+                    keep = self._partial_tag_length(self._buffer, self.CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE_TAG):]
+                self._inside = False
+            else:
+                start = self._buffer.find(self.OPEN_TAG)
+                if start < 0:
+                    keep = self._partial_tag_length(self._buffer, self.OPEN_TAG)
+                    visible.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                visible.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN_TAG):]
+                self._inside = True
+        return "".join(visible)
+
+    def flush(self) -> str:
+        """Akış bittiğinde bekletilen metni döndürür; kapanmamış düşünme bloğu atılır."""
+        rest = "" if self._inside else self._buffer
+        self._buffer = ""
+        return rest
+
+
 class Summarizer:
     SUMMARY_PARAMS = {
         "temperature": 0.2,
         "top_p": 0.85,
-        "num_predict": 4000,
+        "num_predict": SUMMARY_NUM_PREDICT,
         "frequency_penalty": 0.5,
         "presence_penalty": 0.3,
+        "num_ctx": OLLAMA_NUM_CTX,
     }
+    LLM_SLOTS = threading.BoundedSemaphore(OLLAMA_NUM_PARALLEL)
     
     @staticmethod
     def detect_language(text: str) -> str:
@@ -39,92 +107,126 @@ class Summarizer:
         return 'tr'
 
     @staticmethod
-    def run_ollama_command(prompt: str, model: str, timeout: int = 300) -> str:
+    def stream_ollama_command(prompt: str, model: str, timeout: int = 300,
+                              cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """Model çıktısını üretildikçe, <think> blokları ayıklanmış parçalar halinde döndürür.
+
+        cancel_event verilmezse süren işin JOB_CANCEL_EVENT olayı kullanılır.
+        """
+        if cancel_event is None:
+            cancel_event = JOB_CANCEL_EVENT.get()
+        think_filter = ThinkFilter()
+        deadline = time.monotonic() + timeout
+        # Sunucunun OLLAMA_NUM_PARALLEL sınırından fazla eşzamanlı istek sırada bekler; sırada geçen
+        # süre zaman aşımına dahildir ve iptal edilen iş sıranın açılmasını beklemez
+        while not Summarizer.LLM_SLOTS.acquire(timeout=OLLAMA_CANCEL_POLL_S):
+            if cancel_event is not None and cancel_event.is_set():
+                raise OllamaCancelled(f"'{model}' üretimi sırada beklerken iptal edildi")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"İşlem {timeout} saniye içinde tamamlanamadı")
+        try:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"İşlem {timeout} saniye içinde tamamlanamadı")
+            for chunk in OLLAMA_CLIENT.stream_generate(model, prompt, options=Summarizer.SUMMARY_PARAMS,
+                                                       timeout=deadline - time.monotonic(), cancel_event=cancel_event):
+                visible = think_filter.feed(chunk.get("response", ""))
+                if visible:
+                    yield visible
+                if chunk.get("done"):
+                    logger.info(f"'{model}' tamamlandı: {OllamaClient.timing_summary(chunk)}")
+        finally:
+            Summarizer.LLM_SLOTS.release()
+        rest = think_filter.flush()
+        if rest:
+            yield rest
+
+    @staticmethod
+    def run_ollama_command(prompt: str, model: str, timeout: int = 300,
+                           cancel_event: Optional[threading.Event] = None,
+                           on_update: Optional[Callable[[str], None]] = None, use_cache: bool = True) -> str:
+        """Modeli yerel Ollama HTTP API'si üzerinden SUMMARY_PARAMS seçenekleriyle çalıştırır.
+
+        on_update verilirse her yeni parçada o ana kadar üretilen görünür metinle çağrılır.
+        Aynı model, istem ve parametrelerle yapılan çağrılar önbellekten yanıtlanır; örnekleme
+        çeşitliliği istenen çağrılar use_cache=False ile önbelleği atlayabilir.
+        """
+        cache_key = None
+        if use_cache and LLM_CACHE is not None:
+            cache_key = LLMCache.make_key(model, prompt, Summarizer.SUMMARY_PARAMS)
+            cached = LLM_CACHE.get(cache_key)
+            if cached is not None:
+                logger.info(f"'{model}' yanıtı önbellekten alındı")
+                if on_update:
+                    on_update(cached)
+                return cached
+        
         try:
             logger.info(f"'{model}' modeli çalıştırılıyor (zaman aşımı: {timeout}s)")
             
-            process = subprocess.run(
-                ["ollama", "run", model],
-                input=prompt,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                timeout=timeout,
-                check=False
-            )
-            
-            if process.returncode != 0:
-                error_msg = f"Model çalıştırma hatası (kod {process.returncode}): {process.stderr}"
-                logger.error(error_msg)
-                raise RuntimeError(f"Model çalıştırma hatası: {process.stderr}")
+            output = ""
+            for piece in Summarizer.stream_ollama_command(prompt, model, timeout, cancel_event):
+                output += piece
+                if on_update:
+                    on_update(output)
                 
-            output = process.stdout.strip()
+            output = output.strip()
             if not output:
                 logger.warning(f"'{model}' modeli boş yanıt döndürdü")
                 raise ValueError("Model boş yanıt döndürdü")
                 
-            return Summarizer.clean_output(output)
+            result = Summarizer.clean_output(output)
+            if cache_key is not None:
+                LLM_CACHE.put(cache_key, result)
+            return result
             
-        except subprocess.TimeoutExpired:
+        except TimeoutError:
             logger.error(f"'{model}' modeli {timeout} saniye sonra zaman aşımına uğradı")
             raise TimeoutError(f"İşlem {timeout} saniye içinde tamamlanamadı")
             
+        except OllamaCancelled:
+            logger.info(f"'{model}' çalıştırması iptal edildi")
+            raise
+            
         except Exception as e:
             logger.error(f"'{model}' çalıştırma hatası: {str(e)}", exc_info=True)
             raise
     
+    @staticmethod
+    def llm_cache_stats() -> Dict[str, int]:
+        """Model yanıt önbelleğinin bellek/disk isabet ve ıskalama sayılarını döndürür."""
+        return LLM_CACHE.stats() if LLM_CACHE is not None else {}
+    
     @staticmethod
     def ensure_ollama_service(model_name: str) -> bool:
-        """Ollama servisinin çalışır durumda olduğunu ve modelin yüklü olduğunu kontrol eder."""
-        try:
-            logger.info(f"{model_name} modeli için Ollama servisi kontrolü yapılıyor")
-            # Modelin yüklü olup olmadığını kontrol et
-            check_process = subprocess.run(
-                ["ollama", "list"], 
-                capture_output=True, 
-                text=True, 
-                timeout=10
-            )
-            
-            if model_name not in check_process.stdout:
-                logger.warning(f"{model_name} modeli yüklü değil, yükleniyor...")
-                pull_process = subprocess.run(
-                    ["ollama", "pull", model_name],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-                if pull_process.returncode != 0:
-                    logger.error(f"Model yükleme hatası: {pull_process.stderr}")
-                    return False
-            
-            return True
-        except Exception as e:
-            logger.error(f"Ollama servis kontrolü hatası: {e}")
-            return False
+        """Ollama servisinin çalışır durumda olduğunu ve modelin yüklü olduğunu kontrol eder; model yoksa indirir."""
+        return MODEL_REGISTRY.ensure_model(model_name)
     
     @staticmethod
     def select_appropriate_model(text_length: int, mode: str) -> str:
-        """Metin uzunluğu ve mod tercihi ile sistem durumuna göre uygun model seçer."""
+        """Metin uzunluğu ve mod tercihi ile önbelleklenmiş model kaydına göre uygun model seçer."""
         if mode == "basic" or text_length < 1000:
             return SUMMARY_MODEL_FALLBACK
-        
-        # Sistem durumunu kontrol et
-        is_primary_available = Summarizer.ensure_ollama_service(SUMMARY_MODEL_PRIMARY)
-        
-        if is_primary_available:
-            # Birincil modelin yüklü ve kullanılabilir olduğunu doğrula
+        return Summarizer.primary_model()
+    
+    @staticmethod
+    def primary_model() -> str:
+        """Birincil model sunucuda indirilmişse onu, değilse yedek modeli döndürür.
+
+        Karar önbelleklenmiş model kaydından verilir; eksik model burada indirilmez ve
+        indirilmemiş modele istek gönderip hata beklemek yerine doğrudan yedeğe geçilir.
+        """
+        if MODEL_REGISTRY.has_model(SUMMARY_MODEL_PRIMARY):
+            if not MODEL_REGISTRY.is_loaded(SUMMARY_MODEL_PRIMARY):
+                logger.info(f"{SUMMARY_MODEL_PRIMARY} bellekte değil, ilk çağrı model yükleme süresini içerecek")
             return SUMMARY_MODEL_PRIMARY
-        else:
-            logger.warning(f"Birincil model {SUMMARY_MODEL_PRIMARY} kullanılamıyor, yedek model {SUMMARY_MODEL_FALLBACK} kullanılacak")
-            return SUMMARY_MODEL_FALLBACK
+        logger.warning(f"Birincil model {SUMMARY_MODEL_PRIMARY} kullanılamıyor, yedek model {SUMMARY_MODEL_FALLBACK} kullanılacak")
+        return SUMMARY_MODEL_FALLBACK
     
     @staticmethod
-    def create_basic_summary(text: str, timeout: int = SUMMARY_TIMEOUT_BASIC) -> str:
-        if len(text) > 10000:
-            text = text[:10000]
-        
-        lang = Summarizer.detect_language(text)
+    def create_basic_summary(text: str, timeout: int = SUMMARY_TIMEOUT_BASIC, lang: Optional[str] = None,
+                             on_update: Optional[Callable[[str], None]] = None) -> str:
+        lang = lang or Summarizer.detect_language(text)
+        text = Summarizer.condense_text(text, lang)
         
         if (lang == 'tr'):
             prompt = f"""Aşağıdaki metni kapsamlı bir şekilde özetle:
@@ -173,8 +275,9 @@ NOTE: This might be a lecture or seminar transcription, so consider ALL content
             logger.info(f"Ana model ile özet oluşturuluyor (zaman aşımı: {timeout}s)...")
             summary = Summarizer.run_ollama_command(
                 prompt=prompt,
-                model=SUMMARY_MODEL_PRIMARY,
-                timeout=timeout
+                model=Summarizer.primary_model(),
+                timeout=timeout,
+                on_update=on_update
             )
             
             if summary and len(summary) > 300:
@@ -218,7 +321,8 @@ This might be a lecture transcript, include ALL important information from the t
                 fallback_summary = Summarizer.run_ollama_command(
                     prompt=fallback_prompt,
                     model=SUMMARY_MODEL_FALLBACK,
-                    timeout=SUMMARY_FALLBACK_TIMEOUT
+                    timeout=SUMMARY_FALLBACK_TIMEOUT,
+                    on_update=on_update
                 )
                 
                 if fallback_summary and len(fallback_summary) > 200:
@@ -326,14 +430,16 @@ Please prepare a detailed summary with this structure:
 This might be a lecture or seminar transcription. Consider ALL important content of the text and create a comprehensive summary."""
     
     @staticmethod
-    def create_initial_summary(text: str, lang: str, timeout: int = 300) -> str:
-        truncated_text = text[:8000] if len(text) > 8000 else text
-        prompt = Summarizer.get_enhanced_prompt(truncated_text, lang)
+    def create_initial_summary(text: str, lang: str, timeout: int = 300,
+                               on_update: Optional[Callable[[str], None]] = None) -> str:
+        # Uzun metinler condense_text ile zaten MAX_META_SUMMARY_TOKENS bütçesine indirilmiştir
+        prompt = Summarizer.get_enhanced_prompt(text, lang)
         
         try:
-            logger.info(f"Birincil model ile özet oluşturuluyor: {SUMMARY_MODEL_PRIMARY}")
+            model = Summarizer.primary_model()
+            logger.info(f"Birincil model ile özet oluşturuluyor: {model}")
             start_time = time.time()
-            result = Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_PRIMARY, timeout)
+            result = Summarizer.run_ollama_command(prompt, model, timeout, on_update=on_update)
             elapsed = time.time() - start_time
             logger.info(f"Birincil model başarıyla çalıştı (süre: {elapsed:.2f}s)")
             return result
@@ -351,8 +457,8 @@ This might be a lecture or seminar transcription. Consider ALL important content
                 logger.error("Birincil model için yetersiz kaynak")
             
             logger.info(f"Yedek modele geçiliyor: {SUMMARY_MODEL_FALLBACK}")
-            fallback_prompt = Summarizer.get_fallback_prompt(truncated_text[:5000], lang)
-            return Summarizer.run_ollama_command(fallback_prompt, SUMMARY_MODEL_FALLBACK, timeout // 2)
+            fallback_prompt = Summarizer.get_fallback_prompt(text[:5000], lang)
+            return Summarizer.run_ollama_command(fallback_prompt, SUMMARY_MODEL_FALLBACK, timeout // 2, on_update=on_update)
     
     @staticmethod
     def extract_sections(summary: str) -> List[Dict[str, str]]:
@@ -368,27 +474,9 @@ This might be a lecture or seminar transcription. Consider ALL important content
         return sections
     
     @staticmethod
-    def extract_relevant_text(original_text: str, section_title: str) -> str:
-        title_lower = section_title.lower()
-        keywords = re.findall(r'\b\w+\b', title_lower)
-        keywords = [k for k in keywords if len(k) > 3 and k not in ["and", "the", "for", "with", "this", "that", "what", "where", "when", "how", "which"]]
-        
-        paragraphs = original_text.split('\n\n')
-        relevant_paragraphs = []
-        
-        for paragraph in paragraphs:
-            paragraph_lower = paragraph.lower()
-            if any(keyword in paragraph_lower for keyword in keywords):
-                relevant_paragraphs.append(paragraph)
-        
-        if len(relevant_paragraphs) < 3 and len(keywords) > 0:
-            relevant_paragraphs = [p for p in paragraphs if any(keyword in p.lower() for keyword in keywords)]
-        
-        relevant_text = '\n\n'.join(relevant_paragraphs)
-        if len(relevant_text) > 5000:
-            relevant_text = relevant_text[:5000]
-        
-        return relevant_text
+    def extract_relevant_text(index: TranscriptIndex, section: Dict[str, str]) -> str:
+        """Bölümün başlığı ve içeriğiyle dizinde arama yapıp bütçe içindeki en ilgili transkript pencerelerini döndürür."""
+        return index.relevant_text(f"{section['title']} {section['content']}")
     
     @staticmethod
     def enhance_section(section: Dict[str, str], relevant_text: str, lang: str, timeout: int = 120) -> str:
@@ -552,7 +640,7 @@ Original text:
 Add domain-specific perspectives, terminology, and conceptual frameworks for the '{domain}' field. Highlight and integrate important elements specific to this domain into the summary."""
         
         try:
-            enhanced_summary = Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_PRIMARY, timeout)
+            enhanced_summary = Summarizer.run_ollama_command(prompt, Summarizer.primary_model(), timeout)
             if len(enhanced_summary) > len(summary):
                 return enhanced_summary
             return summary
@@ -677,7 +765,8 @@ Return only the numerical scores comma-separated: coverage,detail,balance,cohere
             return {"coverage": 0.5, "detail": 0.5, "balance": 0.5, "coherence": 0.5}
     
     @staticmethod
-    def improve_weak_sections(summary: str, text: str, quality_scores: Dict[str, float], lang: str) -> str:
+    def improve_weak_sections(summary: str, text: str, quality_scores: Dict[str, float], lang: str,
+                              index: Optional[TranscriptIndex] = None) -> str:
         if quality_scores["detail"] >= 0.7 and quality_scores["coverage"] >= 0.7:
             return summary
         
@@ -687,10 +776,15 @@ Return only the numerical scores comma-separated: coverage,detail,balance,cohere
             return summary
         
         if quality_scores["detail"] < 0.7:
-            for i, section in enumerate(sections):
-                if len(section["content"]) < 200 and len(section["title"]) > 3:
-                    relevant_text = Summarizer.extract_relevant_text(text, section["title"])
-                    sections[i]["content"] = Summarizer.enhance_section(section, relevant_text, lang)
+            weak = [i for i, section in enumerate(sections) if len(section["content"]) < 200 and len(section["title"]) > 3]
+            index = index or TranscriptIndex(text, lang)
+            
+            def enhance(i):
+                relevant_text = Summarizer.extract_relevant_text(index, sections[i])
+                return Summarizer.enhance_section(sections[i], relevant_text, lang)
+            
+            for i, content in zip(weak, parallel_map(enhance, weak)):
+                sections[i]["content"] = content
         
         if quality_scores["coverage"] < 0.7:
             if lang == 'tr':
@@ -751,41 +845,52 @@ Identify at least 3 important points or topics that are missing in the summary."
         return cleaned.strip()
     
     @staticmethod
-    def create_enhanced_summary(text: str, timeout: int = SUMMARY_TIMEOUT_ENHANCED) -> str:
+    def create_enhanced_summary(text: str, timeout: int = SUMMARY_TIMEOUT_ENHANCED, lang: Optional[str] = None,
+                                on_update: Optional[Callable[[str], None]] = None) -> str:
+        """Çok aşamalı gelişmiş özet oluşturur; on_update yalnızca ilk özetin akışını gösterir."""
         if not text:
             return "Metin boş olduğu için özet oluşturulamadı."
         
-        if len(text) > 10000:
-            text = text[:10000]
-        
-        lang = Summarizer.detect_language(text)
+        lang = lang or Summarizer.detect_language(text)
         logger.info(f"Creating enhanced summary in '{lang}' language")
         
+        # Bölüm geliştirme için ilgili pasajlar tam transkriptin dizininden, özet aşamaları ara özetten beslenir
+        index = TranscriptIndex(text, lang)
+        
         try:
-            initial_summary = Summarizer.create_initial_summary(text, lang, timeout)
-            
-            sections = Summarizer.extract_sections(initial_summary)
-            enhanced_sections = []
+            def enhance_sections(initial_summary):
+                def enhance(section):
+                    relevant_text = Summarizer.extract_relevant_text(index, section)
+                    return {"title": section["title"], "content": Summarizer.enhance_section(section, relevant_text, lang)}
+                return Summarizer.integrate_sections(parallel_map(enhance, Summarizer.extract_sections(initial_summary)))
             
-            for section in sections:
-                relevant_text = Summarizer.extract_relevant_text(text, section["title"])
-                enhanced_content = Summarizer.enhance_section(section, relevant_text, lang)
-                enhanced_sections.append({"title": section["title"], "content": enhanced_content})
+            def analyze_relationships(concepts):
+                if len(concepts) >= 5:
+                    return Summarizer.analyze_concepts_relationships(concepts, text, lang)
+                return ""
             
-            enhanced_summary = Summarizer.integrate_sections(enhanced_sections)
+            # Kavram ve alan aşamaları yalnızca metnin başından örnek aldığından map-reduce'u beklemez;
+            # ara özete ihtiyaç duyan aşamalar "condensed" görevine bağlıdır. Bölümler paralel geliştirilir
+            graph = TaskGraph()
+            graph.add("condensed", lambda: Summarizer.condense_text(text, lang))
+            graph.add("initial", lambda condensed: Summarizer.create_initial_summary(condensed, lang, timeout, on_update=on_update),
+                      "condensed")
+            graph.add("concepts", lambda: Summarizer.extract_key_concepts(text, lang))
+            graph.add("domain", lambda: Summarizer.detect_domain(text, lang))
+            graph.add("enhanced", enhance_sections, "initial")
+            graph.add("relationships", analyze_relationships, "concepts")
+            graph.add("domain_enhanced",
+                      lambda summary, domain, condensed: Summarizer.add_domain_specific_analysis(summary, domain, condensed, lang),
+                      "enhanced", "domain", "condensed")
+            graph.add("quality", lambda summary, condensed: Summarizer.evaluate_summary_quality(summary, condensed, lang),
+                      "domain_enhanced", "condensed")
+            graph.add("final", lambda summary, scores, condensed: Summarizer.improve_weak_sections(summary, condensed, scores, lang, index),
+                      "domain_enhanced", "quality", "condensed")
+            results = graph.run()
             
-            concepts = Summarizer.extract_key_concepts(text, lang)
-            
-            concept_relationships = ""
-            if len(concepts) >= 5:
-                concept_relationships = Summarizer.analyze_concepts_relationships(concepts, text, lang)
-            
-            domain = Summarizer.detect_domain(text, lang)
-            domain_enhanced_summary = Summarizer.add_domain_specific_analysis(enhanced_summary, domain, text, lang)
-            
-            quality_scores = Summarizer.evaluate_summary_quality(domain_enhanced_summary, text, lang)
-            
-            final_summary = Summarizer.improve_weak_sections(domain_enhanced_summary, text, quality_scores, lang)
+            concepts = results["concepts"]
+            concept_relationships = results["relationships"]
+            final_summary = results["final"]
             
             if concept_relationships and len(concept_relationships) > 100:
                 if lang == 'tr':
@@ -816,17 +921,19 @@ Identify at least 3 important points or topics that are missing in the summary."
             
             try:
                 logger.info(f"Falling back to basic summary")
-                return Summarizer.create_basic_summary(text, timeout)
+                # Parça özetleri önbellekte olduğundan tam metin yeniden özetlenmeden kullanılır
+                return Summarizer.create_basic_summary(text, timeout, lang, on_update=on_update)
             except Exception as e:
                 logger.error(f"Basic summary fallback error: {e}")
                 return f"Özet oluşturulamadı: {str(e)}"
     
     @staticmethod
-    def create_quick_summary(text: str, timeout: int = 90) -> str:
+    def create_quick_summary(text: str, timeout: int = 90, lang: Optional[str] = None,
+                             cancel_event: Optional[threading.Event] = None) -> str:
         if not text:
             return "Metin boş olduğu için özet oluşturulamadı."
         
-        lang = Summarizer.detect_language(text)
+        lang = lang or Summarizer.detect_language(text)
         
         if lang == 'tr':
             prompt = f"""Aşağıdaki metni hızlıca özetle:
@@ -842,17 +949,18 @@ Temel fikri, ana noktaları ve önemli kavramları kapsayan özlü bir özet olu
 Create a concise summary covering the main idea, key points, and important concepts."""
         
         try:
-            return Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_FALLBACK, timeout)
+            return Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_FALLBACK, timeout, cancel_event)
         except Exception as e:
             logger.error(f"Quick summary error: {e}")
             return f"Hızlı özet oluşturulamadı: {str(e)}"
     
     @staticmethod
-    def create_comprehensive_summary(text: str, quick_summary: str = "", timeout: int = 300) -> str:
+    def create_comprehensive_summary(text: str, quick_summary: str = "", timeout: int = 300,
+                                     lang: Optional[str] = None, cancel_event: Optional[threading.Event] = None) -> str:
         if not text:
             return "Metin boş olduğu için özet oluşturulamadı."
         
-        lang = Summarizer.detect_language(text)
+        lang = lang or Summarizer.detect_language(text)
         
         context = ""
         if quick_summary:
@@ -895,7 +1003,7 @@ Please create a summary with this structure:
 Make it detailed, comprehensive, and fully reflective of the content."""
         
         try:
-            return Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_PRIMARY, timeout)
+            return Summarizer.run_ollama_command(prompt, Summarizer.primary_model(), timeout, cancel_event)
         except Exception as e:
             logger.error(f"Comprehensive summary error: {e}")
             if quick_summary:
@@ -903,11 +1011,137 @@ Make it detailed, comprehensive, and fully reflective of the content."""
             return f"Kapsamlı özet oluşturulamadı: {str(e)}"
     
     @staticmethod
-    def chunk_text(text: str) -> List[str]:
-        return [text[i:i+SUMMARY_CHUNK_SIZE] for i in range(0, len(text), SUMMARY_CHUNK_SIZE)]
+    def chunk_text(text: str, lang: Optional[str] = None) -> List[str]:
+        """Metni cümle sınırlarında, istem şablonu payı düşülmüş MAX_INPUT_TOKENS bütçesine göre böler."""
+        return TextChunker.chunk(text, MAX_INPUT_TOKENS - SUMMARY_PROMPT_RESERVE_TOKENS,
+                                 SUMMARY_CHUNK_OVERLAP_TOKENS, lang)
+    
+    @staticmethod
+    def estimate_tokens(text: str, lang: Optional[str] = None) -> int:
+        return TokenCounter.count(text, lang)
+    
+    @staticmethod
+    def summarize_chunk(chunk: str, index: int, total: int, lang: str,
+                        timeout: int = SUMMARY_FALLBACK_TIMEOUT) -> str:
+        """Map aşaması: transkriptin bir parçasını sonraki birleştirmeler için yoğun notlara indirger."""
+        if lang == 'tr':
+            prompt = f"""Aşağıda uzun bir transkriptin {index + 1}/{total}. bölümü var. Bu bölümü yoğun notlar halinde özetle:
+
+{chunk}
+
+Bölümdeki tüm ana fikirleri, tanımlanan kavramları, teknik terimleri, sayısal verileri, örnekleri ve sonuçları koru.
+Giriş cümlesi veya yorum ekleme; yalnızca bu bölümde geçen bilgileri, geçtikleri sırayla yaz."""
+        else:
+            prompt = f"""Below is part {index + 1}/{total} of a long transcript. Summarize this part as dense notes:
+
+{chunk}
+
+Keep every main idea, defined concept, technical term, numerical value, example and conclusion in this part.
+Do not add an introduction or commentary; write only the information in this part, in the order it appears."""
+        
+        try:
+            return Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_FALLBACK, timeout)
+        except OllamaCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Parça {index + 1}/{total} özetlenemedi, parçanın kendisi kullanılıyor: {e}")
+            return chunk
+    
+    @staticmethod
+    def merge_partial_summaries(partials: List[str], lang: str, timeout: int = SUMMARY_FALLBACK_TIMEOUT) -> str:
+        """Reduce aşaması: ardışık bölümlerin notlarını sırayı koruyarak tek bir not metninde birleştirir."""
+        if len(partials) == 1:
+            return partials[0]
+        joined = "\n\n".join(partials)
+        if lang == 'tr':
+            prompt = f"""Aşağıda bir transkriptin ardışık bölümlerinden çıkarılmış notlar var:
+
+{joined}
+
+Bu notları tek bir tutarlı not metninde birleştir. Tekrarları çıkar, ancak hiçbir kavramı, teknik terimi, sayısal veriyi veya sonucu atlama. Konuların sırasını koru."""
+        else:
+            prompt = f"""Below are notes taken from consecutive parts of a transcript:
+
+{joined}
+
+Merge these notes into a single coherent set of notes. Remove repetition, but do not drop any concept, technical term, numerical value or conclusion. Keep the order of topics."""
+        
+        try:
+            return Summarizer.run_ollama_command(prompt, SUMMARY_MODEL_FALLBACK, timeout)
+        except OllamaCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Ara özetler birleştirilemedi, ardışık olarak bırakılıyor: {e}")
+            return joined
     
     @staticmethod
-    def summarize_text(transcription: str, mode: str = "basic", timeout: int = None) -> str:
+    def group_partials(partials: List[str], budget_tokens: int, lang: Optional[str] = None) -> List[List[str]]:
+        """Ardışık ara özetleri, her grup bütçeye sığacak ve en az iki öğe içerecek şekilde gruplar.
+
+        En az iki öğeli gruplar her seviyede öğe sayısını en az yarıya indirir; böylece birleştirme
+        en fazla log2(parça sayısı) seviyede biter.
+        """
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for partial in partials:
+            tokens = Summarizer.estimate_tokens(partial, lang)
+            if len(current) >= 2 and current_tokens + tokens > budget_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(partial)
+            current_tokens += tokens
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        elif current:
+            groups.append(current)
+        return groups
+    
+    @staticmethod
+    def condense_text(text: str, lang: str) -> str:
+        """Tek çağrıya sığmayan metni map-reduce ile MAX_META_SUMMARY_TOKENS bütçesindeki bir ara özete indirger.
+
+        Parçalar LLM_SLOTS'un izin verdiği kadar paralel özetlenir, ardından ara özetler bütçeye
+        sığana kadar gruplar halinde, yine paralel olarak birleştirilir. Böylece toplam süre parça
+        sayısıyla doğrusal değil, paralel dalga sayısı ve birleştirme seviyesi kadar artar.
+        MAX_INPUT_TOKENS bütçesine sığan metin olduğu gibi döndürülür.
+        """
+        if Summarizer.estimate_tokens(text, lang) <= MAX_INPUT_TOKENS - SUMMARY_PROMPT_RESERVE_TOKENS:
+            return text
+        
+        start_time = time.time()
+        chunks = Summarizer.chunk_text(text, lang)
+        logger.info(f"Metin {len(chunks)} parçaya bölündü, parçalar {OLLAMA_NUM_PARALLEL} eşzamanlı çağrıyla özetleniyor")
+        partials = parallel_map(
+            lambda item: Summarizer.summarize_chunk(item[1], item[0], len(chunks), lang),
+            list(enumerate(chunks)),
+            max_workers=OLLAMA_NUM_PARALLEL,
+        )
+        
+        level = 0
+        while len(partials) > 1 and Summarizer.estimate_tokens("\n\n".join(partials), lang) > MAX_META_SUMMARY_TOKENS:
+            level += 1
+            groups = Summarizer.group_partials(partials, MAX_INPUT_TOKENS - SUMMARY_PROMPT_RESERVE_TOKENS, lang)
+            logger.info(f"Birleştirme seviyesi {level}: {len(partials)} ara özet {len(groups)} gruba indiriliyor")
+            partials = parallel_map(lambda group: Summarizer.merge_partial_summaries(group, lang), groups,
+                                    max_workers=OLLAMA_NUM_PARALLEL)
+        
+        condensed = "\n\n".join(partials)
+        logger.info(f"Map-reduce tamamlandı ({time.time() - start_time:.1f}s): {len(text)} karakter -> "
+                    f"{len(condensed)} karakter, {level} birleştirme seviyesi")
+        return condensed
+    
+    @staticmethod
+    def summarize_text(transcription: str, mode: str = "basic", timeout: int = None, lang: Optional[str] = None,
+                       on_update: Optional[Callable[[str], None]] = None,
+                       cancel_event: Optional[threading.Event] = None) -> str:
+        """Transkripsiyonu özetler.
+
+        lang, transkripsiyon sırasında sabitlenen ya da kullanıcının seçtiği kayıt dilidir;
+        verilmezse metinden bir kez tespit edilir ve tüm aşamalarda yeniden kullanılır.
+        on_update verilirse özet üretilirken o ana kadarki metinle tekrar tekrar çağrılır.
+        cancel_event bu işe aittir; ayarlandığında işin süren ve sonraki tüm model çağrıları iptal edilir.
+        """
         if not transcription or transcription.strip() == "":
             logger.warning("Özetlenecek transkripsiyon boş! Özet oluşturulamıyor.")
             return "Özet oluşturulamadı çünkü transkripsiyon boş veya işleme başarısız oldu."
@@ -919,17 +1153,29 @@ Make it detailed, comprehensive, and fully reflective of the content."""
             else:
                 timeout = SUMMARY_TIMEOUT_BASIC
         
+        lang = lang or Summarizer.detect_language(transcription)
+        
+        cancel_token = JOB_CANCEL_EVENT.set(cancel_event)
+        try:
+            return Summarizer._summarize(transcription, mode, timeout, lang, on_update)
+        finally:
+            JOB_CANCEL_EVENT.reset(cancel_token)
+            if LLM_CACHE is not None:
+                logger.info(f"Model yanıt önbelleği: {Summarizer.llm_cache_stats()}")
+    
+    @staticmethod
+    def _summarize(transcription: str, mode: str, timeout: int, lang: str,
+                   on_update: Optional[Callable[[str], None]]) -> str:
         if mode == "enhanced":
             logger.info(f"Gelişmiş özet oluşturuluyor (zaman aşımı: {timeout}s)...")
-            return Summarizer.create_enhanced_summary(transcription, timeout=timeout)
+            return Summarizer.create_enhanced_summary(transcription, timeout=timeout, lang=lang, on_update=on_update)
         else:
             logger.info(f"Temel özet oluşturuluyor (zaman aşımı: {timeout}s)...")
-            summary = Summarizer.create_basic_summary(transcription, timeout=timeout)
+            summary = Summarizer.create_basic_summary(transcription, timeout=timeout, lang=lang, on_update=on_update)
             
             # Önemli kavramlar ekleme kodu aynı kalabilir
             if "ÖNEMLİ KAVRAMLAR" not in summary and "KEY CONCEPTS" not in summary:
                 try:
-                    lang = Summarizer.detect_language(transcription)
                     concepts = Summarizer.extract_key_concepts(transcription, lang)
                     
                     if lang == 'tr':
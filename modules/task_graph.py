@@ -0,0 +1,88 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def parallel_map(func: Callable[[Any], Any], items: Iterable[Any], max_workers: Optional[int] = None) -> List[Any]:
+    """func'u öğeler üzerinde iş parçacıklarında çalıştırır ve sonuçları giriş sırasıyla döndürür.
+
+    Her çağrı, çağıranın bağlam değişkenlerinin (ör. işin iptal olayı) bir kopyasında çalışır.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers or len(items), thread_name_prefix="map") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+class TaskGraph:
+    """Bağımlılıkları belirtilmiş görevleri, bağımlılıkları biter bitmez eşzamanlı çalıştıran yürütücü.
+
+    Her görev bağımlılıklarının sonuçlarını sırasıyla argüman olarak alır. Bağımsız görevler
+    aynı anda başladığından toplam süre görev sürelerinin toplamı yerine kritik yol kadar olur;
+    model çağrılarının eşzamanlılık sınırı görevlerde değil çağrı katmanında uygulanır.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._tasks: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, func: Callable[..., Any], *dependencies: str) -> None:
+        for dependency in dependencies:
+            if dependency not in self._tasks:
+                raise ValueError(f"'{name}' görevinin bağımlılığı tanımlı değil: {dependency}")
+        self._tasks[name] = (func, dependencies)
+
+    def _timed(self, name: str, func: Callable[..., Any], args: List[Any]) -> Any:
+        start_time = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.timings[name] = round(time.time() - start_time, 2)
+
+    def run(self) -> Dict[str, Any]:
+        """Tüm görevleri çalıştırır ve sonuçları görev adına göre döndürür.
+
+        Bir görev hata verirse yeni görev başlatılmaz, çalışanların bitmesi beklenir ve hata yükseltilir.
+        """
+        results: Dict[str, Any] = {}
+        pending = dict(self._tasks)
+        running = {}
+        error = None
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self._tasks)),
+                                thread_name_prefix="task") as executor:
+            while pending or running:
+                if error is None:
+                    for name, (func, dependencies) in list(pending.items()):
+                        if all(dependency in results for dependency in dependencies):
+                            args = [results[dependency] for dependency in dependencies]
+                            # Görev, grafiği çalıştıranın bağlam değişkenleriyle çalışır
+                            context = contextvars.copy_context()
+                            running[executor.submit(context.run, self._timed, name, func, args)] = name
+                            del pending[name]
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"'{name}' görevi başarısız: {e}")
+                        error = error or e
+
+        if error is not None:
+            raise error
+
+        elapsed = time.time() - start_time
+        logger.info(f"Görev grafiği {elapsed:.1f}s'de tamamlandı (görevlerin toplamı "
+                    f"{sum(self.timings.values()):.1f}s): {self.timings}")
+        return results
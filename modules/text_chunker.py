@@ -0,0 +1,139 @@
+import logging
+import math
+import re
+import threading
+from typing import List, Optional
+from config import SUMMARY_TOKENIZER, SUMMARY_CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+class TokenCounter:
+    """Metnin model token sayısını hesaplar.
+
+    SUMMARY_TOKENIZER ayarlıysa yerel Hugging Face tokenizer'ı bir kez yüklenip kullanılır.
+    Ayarlı değilse veya yüklenemezse dile göre kalibre edilmiş karakter/token oranıyla tahmin
+    yapılır; Türkçe eklemeli yapısı nedeniyle aynı karakter sayısında İngilizceden daha fazla
+    token üretir.
+    """
+
+    _tokenizer = None
+    _tokenizer_loaded = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_tokenizer():
+        if TokenCounter._tokenizer_loaded:
+            return TokenCounter._tokenizer
+        with TokenCounter._lock:
+            if not TokenCounter._tokenizer_loaded:
+                if SUMMARY_TOKENIZER:
+                    try:
+                        from transformers import AutoTokenizer
+                        TokenCounter._tokenizer = AutoTokenizer.from_pretrained(SUMMARY_TOKENIZER)
+                        logger.info(f"Token sayımı için tokenizer yüklendi: {SUMMARY_TOKENIZER}")
+                    except Exception as e:
+                        logger.warning(f"Tokenizer yüklenemedi ({SUMMARY_TOKENIZER}), tahmin kullanılacak: {e}")
+                TokenCounter._tokenizer_loaded = True
+        return TokenCounter._tokenizer
+
+    @staticmethod
+    def measure(text: str) -> int:
+        """Parçaları toplanabilen ölçü: tokenizer varsa token, yoksa karakter sayısı.
+
+        Birleştirilen metnin ölçüsü parçaların ölçülerinin toplamıdır; toplam to_tokens ile bir kez
+        token sayısına çevrilir. Böylece kelime başına yukarı yuvarlama birikmez.
+        """
+        if not text:
+            return 0
+        tokenizer = TokenCounter._get_tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return len(text)
+
+    @staticmethod
+    def to_tokens(measure: int, lang: Optional[str] = None) -> int:
+        if TokenCounter._get_tokenizer() is not None:
+            return measure
+        chars_per_token = SUMMARY_CHARS_PER_TOKEN.get(lang, min(SUMMARY_CHARS_PER_TOKEN.values()))
+        return math.ceil(measure / chars_per_token)
+
+    @staticmethod
+    def count(text: str, lang: Optional[str] = None) -> int:
+        return TokenCounter.to_tokens(TokenCounter.measure(text), lang)
+
+
+class TextChunker:
+    """Metni cümle sınırlarına uyarak token bütçesine göre parçalara böler."""
+
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+    @staticmethod
+    def _split_long_sentence(sentence: str, max_tokens: int, lang: Optional[str]) -> List[str]:
+        """Bütçeden uzun cümleyi (noktalamasız transkriptlerde sık görülür) kelime sınırlarından böler.
+
+        Her kelime önündeki ayırıcıyla birlikte bir kez ölçülür ve parçanın ölçüsü biriktirilir.
+        """
+        pieces: List[str] = []
+        current: List[str] = []
+        current_measure = 0
+        for word in sentence.split():
+            word_measure = TokenCounter.measure(f" {word}")
+            if current and TokenCounter.to_tokens(current_measure + word_measure, lang) > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_measure = [], 0
+            current.append(word)
+            current_measure += word_measure
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    @staticmethod
+    def split_units(text: str, max_tokens: int, lang: Optional[str] = None) -> List[str]:
+        """Metni cümlelere böler; max_tokens'tan uzun cümleleri kelime sınırlarından parçalar."""
+        units: List[str] = []
+        for sentence in TextChunker.split_sentences(text):
+            if TokenCounter.count(sentence, lang) > max_tokens:
+                units.extend(TextChunker._split_long_sentence(sentence, max_tokens, lang))
+            else:
+                units.append(sentence)
+        return units
+
+    @staticmethod
+    def chunk(text: str, max_tokens: int, overlap_tokens: int = 0, lang: Optional[str] = None) -> List[str]:
+        """Cümleleri her parça max_tokens'a olabildiğince yaklaşacak şekilde paketler.
+
+        overlap_tokens > 0 ise her parça, bir öncekinin sonundaki bu bütçeye sığan cümlelerle
+        başlar; böylece parça sınırında bölünen bağlam iki tarafta da görülür. Birimler ölçülürken
+        aralarına konan boşluk da sayılır.
+        """
+        units = TextChunker.split_units(text, max_tokens, lang)
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_measures: List[int] = []
+        current_total = 0
+        for unit in units:
+            unit_measure = TokenCounter.measure(f" {unit}")
+            if current and TokenCounter.to_tokens(current_total + unit_measure, lang) > max_tokens:
+                chunks.append(" ".join(current))
+                # Bir önceki parçanın sonundan örtüşme bütçesine sığan cümleleri taşı
+                carried, carried_total = 0, 0
+                while carried < len(current) - 1 and \
+                        TokenCounter.to_tokens(carried_total + current_measures[-carried - 1], lang) <= overlap_tokens:
+                    carried_total += current_measures[-carried - 1]
+                    carried += 1
+                current = current[len(current) - carried:] if carried else []
+                current_measures = current_measures[len(current_measures) - carried:] if carried else []
+                current_total = carried_total
+                if TokenCounter.to_tokens(current_total + unit_measure, lang) > max_tokens:
+                    current, current_measures, current_total = [], [], 0
+            current.append(unit)
+            current_measures.append(unit_measure)
+            current_total += unit_measure
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
@@ -1,75 +1,445 @@
 import torch
-from transformers import pipeline
+import numpy as np
+import gc
 import logging
-from typing import List, Tuple
-import os
-from config import WHISPER_MODEL
+import threading
+import time
+import wave
+from collections import deque
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import config
+from config import (SAMPLE_RATE, WHISPER_IDLE_EVICT_S, WHISPER_EVICT_MIN_FREE_MB, WHISPER_CACHE_CHECK_INTERVAL_S,
+                    WHISPER_DEVICE, WHISPER_CPU_DTYPE, WHISPER_CPU_QUANTIZE, WHISPER_CPU_THREADS, WHISPER_LANGUAGE,
+                    WHISPER_ASSISTED_DECODING, WHISPER_BACKEND)
+from modules.audio_processor import AudioProcessor
+from modules.asr_backends import ASRBackend, get_backend_class
+from modules.transcript import Transcript, TranscriptBuilder, pipeline_chunks, source_time
+from modules.checkpoint import TranscriptionCheckpoint
 
 logger = logging.getLogger(__name__)
 
+def available_memory_mb(device: str) -> Optional[float]:
+    """Cihazda kullanılabilir belleği MB olarak döndürür; ölçülemiyorsa None."""
+    try:
+        if device == "cuda":
+            free_bytes, _ = torch.cuda.mem_get_info()
+            return free_bytes / 1024**2
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except Exception:
+        pass
+    return None
+
+
+class WhisperModelCache:
+    """Süreç genelinde paylaşılan, tembel yüklenen Whisper pipeline tutucusu.
+
+    Model işler ve Streamlit yeniden çalıştırmaları arasında sıcak kalır; belirli bir süre
+    boşta kalırsa veya bellek daralırsa arka plandaki denetleyici tarafından boşaltılır.
+    """
+
+    def __init__(self, idle_timeout_s: float = WHISPER_IDLE_EVICT_S,
+                 min_free_memory_mb: float = WHISPER_EVICT_MIN_FREE_MB,
+                 check_interval_s: float = WHISPER_CACHE_CHECK_INTERVAL_S):
+        self.idle_timeout_s = idle_timeout_s
+        self.min_free_memory_mb = min_free_memory_mb
+        self.check_interval_s = check_interval_s
+        self._lock = threading.RLock()
+        self._model = None
+        self._key = None
+        self._users = 0
+        self._last_used = 0.0
+        self._watchdog = None
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @property
+    def _device(self) -> Optional[str]:
+        return self._key[0] if self._key else None
+
+    def acquire(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """(cihaz, hassasiyet...) anahtarına uyan yüklü modeli döndürür; yoksa loader ile yükler.
+
+        Her acquire için release çağrılmalıdır.
+        """
+        with self._lock:
+            if self._model is not None and self._key != key:
+                self._evict("model yapılandırması değişti")
+
+            if self._model is None:
+                start_time = time.time()
+                self._model = loader()
+                self._key = key
+                elapsed = time.time() - start_time
+                self.loads += 1
+                self.load_seconds += elapsed
+                logger.info(f"Whisper modeli yüklendi ({elapsed:.1f}s), sıcak tutulacak")
+            else:
+                self.hits += 1
+                logger.info("Sıcak Whisper modeli yeniden kullanılıyor")
+
+            self._users += 1
+            self._last_used = time.time()
+            self._start_watchdog()
+            return self._model
+
+    def release(self) -> None:
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            self._last_used = time.time()
+
+    def evict(self, reason: str = "manuel") -> bool:
+        """Model kullanımda değilse bellekten atar."""
+        with self._lock:
+            if self._model is None or self._users > 0:
+                return False
+            self._evict(reason)
+            return True
+
+    def _evict(self, reason: str) -> None:
+        device = self._device
+        # Süreç havuzu gibi kaynak tutan nesneler açıkça kapatılır
+        close = getattr(self._model, "close", None)
+        if callable(close):
+            close()
+        self._model = None
+        self._key = None
+        self.evictions += 1
+        gc.collect()
+        if device == "cuda":
+            torch.cuda.empty_cache()
+        logger.info(f"Whisper modeli bellekten atıldı ({reason})")
+
+    def _start_watchdog(self) -> None:
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="whisper-cache-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.check_interval_s)
+            with self._lock:
+                if self._model is None:
+                    self._watchdog = None
+                    return
+                if self._users > 0:
+                    continue
+                if time.time() - self._last_used >= self.idle_timeout_s:
+                    self._evict("boşta kalma süresi doldu")
+                    continue
+                free_mb = available_memory_mb(self._device)
+                if free_mb is not None and free_mb < self.min_free_memory_mb:
+                    self._evict(f"bellek baskısı, {free_mb:.0f} MB boş")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._model is not None,
+                "config": self._key,
+                "in_use": self._users,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 2),
+                "idle_seconds": round(time.time() - self._last_used, 1) if self._model is not None else None,
+            }
+
+
+MODEL_CACHE = WhisperModelCache()
+
 class Transcriber:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+    EMPTY_RESULT_MESSAGE = "Transkripsiyon işlemi başarısız oldu. Lütfen ses dosyasını kontrol edin."
+    LANGUAGE_DETECTION_SECONDS = 30
+
+    def __init__(self, device: Optional[str] = None, cpu_dtype: str = WHISPER_CPU_DTYPE,
+                 cpu_quantize: bool = WHISPER_CPU_QUANTIZE, cpu_threads: Optional[int] = WHISPER_CPU_THREADS,
+                 language: Optional[str] = WHISPER_LANGUAGE, assisted: bool = WHISPER_ASSISTED_DECODING,
+                 backend: str = WHISPER_BACKEND):
+        self.device = self.resolve_device(device)
         logger.info(f"Cihaz: {self.device}")
         
         if self.device == "cuda":
             torch.backends.cudnn.benchmark = True
             logger.info(f"GPU: {torch.cuda.get_device_name(0)}")
             logger.info(f"Toplam GPU belleği: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
+            self.dtype = "float16"
+            self.quantize = False
+        else:
+            self.dtype = cpu_dtype
+            self.quantize = cpu_quantize and cpu_dtype == "float32"
+            if cpu_quantize and not self.quantize:
+                logger.warning(f"Dinamik int8 nicemleme yalnızca float32 ile kullanılabilir, {cpu_dtype} için atlanıyor")
             
+        self.cpu_threads = cpu_threads
+        # None: ilk konuşma içeren seste bir kez tespit edilir ve iş boyunca sabitlenir
+        self.language = None if language in (None, "auto") else language
+        self.assisted = assisted
+        self.backend_class = get_backend_class(backend)
         self.model = None
+        self.last_run_stats = {}
         
+    @staticmethod
+    def resolve_device(device: Optional[str] = None) -> str:
+        """Yapılandırılan cihazı ("auto" dahil) "cuda" veya "cpu" olarak çözer."""
+        if device is None:
+            device = WHISPER_DEVICE
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        return device
+
+    def _model_key(self) -> Tuple:
+        # İlk öğe cihazdır; önbellek denetleyicisi bellek ölçümü ve CUDA temizliği için onu kullanır
+        return (self.device, self.backend_class.name, self.dtype, self.quantize, self.assisted)
+
+    def _build_backend(self) -> ASRBackend:
+        backend = self.backend_class(self.device, self.dtype, self.quantize, self.cpu_threads, self.assisted)
+        return backend.load()
+
     def load_model(self) -> None:
-        """Whisper modelini yükler."""
+        """Whisper motorunu paylaşılan önbellekten alır, gerekirse yükler."""
+        if self.model is not None:
+            return
         try:
-            logger.info(f"Whisper modeli yükleniyor: {WHISPER_MODEL}")
-            self.model = pipeline(
-                "automatic-speech-recognition", 
-                model=WHISPER_MODEL, 
-                device=self.device,
-                torch_dtype=torch.float16
-            )
+            self.model = MODEL_CACHE.acquire(self._model_key(), self._build_backend)
         except Exception as e:
             logger.error(f"Model yükleme hatası: {e}")
             raise
             
-    def transcribe_segments(self, segment_files: List[Tuple[str, int]]) -> str:
-        """Ses segmentlerini transkribe eder ve birleştirir."""
+    @staticmethod
+    def decoding_params(language: Optional[str] = WHISPER_LANGUAGE, backend: str = WHISPER_BACKEND,
+                        device: Optional[str] = None) -> Dict[str, Any]:
+        """Transkripsiyon çıktısını etkileyen cihaz, motor, model, dil, çözme ve segmentleme ayarlarını döndürür.
+
+        Ses çözme modu ve paralel çözme pencereleri segment sınırlarını, dolayısıyla metni değiştirdiğinden
+        onlar da dahildir; yalnızca hızı etkileyen işçi sayısı gibi ayarlar anahtara girmez.
+        """
+        params = get_backend_class(backend).decoding_params()
+        params.update({
+            "backend": backend,
+            "device": Transcriber.resolve_device(device),
+            "language": language or "auto",
+            "cpu_precision": [WHISPER_CPU_DTYPE, WHISPER_CPU_QUANTIZE],
+            "sample_rate": SAMPLE_RATE,
+            "segmentation": {name: getattr(config, name) for name in dir(config)
+                             if name.startswith("VAD_")
+                             or name in ("SEGMENT_DURATION_MS", "AUDIO_DECODE_MODE", "PARALLEL_DECODE_WINDOW_MS",
+                                         "PARALLEL_DECODE_MIN_DURATION_S")},
+        })
+        return params
+
+    @staticmethod
+    def _segment_seconds(segment: Union[str, np.ndarray]) -> float:
+        """Segmentin ses süresini saniye olarak döndürür."""
+        if isinstance(segment, np.ndarray):
+            return len(segment) / SAMPLE_RATE
+        try:
+            with wave.open(segment, "rb") as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, OSError, EOFError):
+            return 0.0
+
+    def detect_language(self, segment: Union[str, np.ndarray]) -> Optional[str]:
+        """Segmentteki ilk konuşmanın 30 saniyesinde Whisper dil tespitini bir kez çalıştırır.
+
+        Tespit başarısız olursa None döner ve Whisper dili her parçada kendisi belirler.
+        """
+        try:
+            samples = segment if isinstance(segment, np.ndarray) else AudioProcessor.decode_to_array(segment)
+            samples = AudioProcessor.to_float32(
+                AudioProcessor.first_speech_window(samples, self.LANGUAGE_DETECTION_SECONDS))
+            language = self.model.detect_language(samples)
+        except Exception as e:
+            logger.warning(f"Dil tespiti başarısız, kayıt dili sabitlenmedi; Whisper dili her parçada ayrıca "
+                           f"belirleyecek: {e}")
+            return None
+        if not language:
+            logger.warning("Dil tespiti sonuç vermedi, kayıt dili sabitlenmedi; Whisper dili her parçada ayrıca belirleyecek")
+            return None
+
+        logger.info(f"Kayıt dili tespit edildi ve iş boyunca sabitlendi: {language}")
+        return language
+
+    def _transcribe_single(self, segment: Union[str, np.ndarray]) -> Dict[str, Any]:
+        return self.model.transcribe_one(segment, self.language)
+
+    def _iter_pipeline_outputs(self, segment_files: Iterable[Tuple[Union[str, np.ndarray], int, int]]
+                               ) -> Iterator[Tuple[Union[str, np.ndarray], int, int, Optional[Dict[str, Any]]]]:
+        """Tüm segmentleri tek bir akış olarak motora verir ve (segment, sıra, ofset, çıktı) sonuçlarını sırayla döndürür.
+
+        HF pipeline motoru 30 saniyelik parçaları farklı segmentlerden de olsa aynı batch'te
+        toplar; böylece kısa segmentler batch_size'ı boş bırakmaz. Toplu çalıştırma başarısız
+        olursa kalan segmentler tek tek işlenir ve hatalı segment için None döner. Segment kaynağından
+        gelen hatalar yakalanmaz; aksi halde tükenmiş kaynaktaki kalan segmentler sessizce kaybolurdu.
+        """
+        pending = deque()
+        source = iter(segment_files)
+        source_errors = []
+
+        def backend_inputs():
+            while True:
+                try:
+                    item = next(source)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    # Segment kaynağının hatası (ör. ffmpeg pencere hatası) motor hatası sayılmaz
+                    source_errors.append(e)
+                    raise
+                pending.append(item)
+                yield item[0]
+
+        outputs = self.model.transcribe(backend_inputs(), self.language)
+        while True:
+            try:
+                output = next(outputs)
+            except StopIteration:
+                return
+            except Exception as e:
+                if source_errors:
+                    raise source_errors[0]
+                logger.error(f"Toplu transkripsiyon hatası, kalan segmentler tek tek işleniyor: {e}")
+                break
+            segment, idx, offset_ms = pending.popleft()
+            yield segment, idx, offset_ms, output
+
+        for segment, idx, offset_ms in chain(list(pending), source):
+            try:
+                output = self._transcribe_single(segment)
+            except Exception as e:
+                logger.error(f"Segment {idx+1} transkripsiyon hatası: {e}")
+                output = None
+            yield segment, idx, offset_ms, output
+
+    def iter_transcriptions(self, segment_files: Iterable[Tuple[Union[str, np.ndarray], int, int]],
+                            checkpoint: Optional[TranscriptionCheckpoint] = None) -> Iterator[Dict[str, Any]]:
+        """Her segmentin sonucunu, segment biter bitmez metni, zamanlaması ve hızıyla birlikte üretir.
+
+        Üretilen sözlük: index, offset_ms, duration_s, end_s, text, chunks (mutlak zamanlı
+        (başlangıç, bitiş, metin) üçlüleri), failed, restored, completed, total, elapsed_s
+        (işin başından beri) ve throughput (saniyede işlenen ses saniyesi). Başarısız segment sayısı
+        last_run_stats["failed_segments"] içinde tutulur.
+
+        checkpoint verilirse her başarılı segment kalıcı olarak kaydedilir; önceki bir çalıştırmada
+        tamamlanmış baştaki segmentler yeniden transkribe edilmeden kontrol noktasından döndürülür.
+        """
         if not self.model:
             self.load_model()
             
-        full_transcription = ""
+        total_segments = len(segment_files) if hasattr(segment_files, "__len__") else None
+        completed = 0
+        succeeded = 0
+        failed = 0
+        audio_seconds = 0.0
+        start_time = time.time()
         
-        for segment_path, idx in segment_files:
-            logger.info(f"Segment işleniyor {idx+1}/{len(segment_files)}...")
-            
-            if self.device == "cuda":
-                torch.cuda.empty_cache()
+        def build_result(idx, offset_ms, segment_seconds, source_seconds, text, chunks, failed, restored):
+            elapsed = time.time() - start_time
+            self.last_run_stats = {
+                "audio_seconds": round(audio_seconds, 2),
+                "elapsed_seconds": round(elapsed, 2),
+                "rtf": round(elapsed / audio_seconds, 4) if audio_seconds else None,
+                "segments": succeeded,
+                "failed_segments": failed,
+            }
+            return {
+                "index": idx,
+                "offset_ms": offset_ms,
+                "duration_s": segment_seconds,
+                "end_s": offset_ms / 1000 + source_seconds,
+                "text": text,
+                "chunks": chunks,
+                "failed": failed,
+                "restored": restored,
+                "completed": completed,
+                "total": total_segments,
+                "elapsed_s": elapsed,
+                "throughput": audio_seconds / elapsed if elapsed > 0 and audio_seconds else None,
+            }
+        
+        source = iter(segment_files)
+        if checkpoint is not None and len(checkpoint):
+            for segment, idx, offset_ms in source:
+                segment_seconds = self._segment_seconds(segment)
+                record = checkpoint.get(offset_ms, segment_seconds)
+                if record is None:
+                    source = chain([(segment, idx, offset_ms)], source)
+                    break
+                completed += 1
+                chunks = [tuple(chunk) for chunk in record["chunks"]]
+                source_seconds = source_time(segment_seconds, getattr(segment, "spans", None))
+                yield build_result(idx, offset_ms, segment_seconds, source_seconds, record["text"], chunks, False, True)
+            if completed:
+                logger.info(f"{completed} segment kontrol noktasından alındı, transkripsiyon kaldığı yerden sürüyor")
+        
+        if self.language is None:
+            first = next(source, None)
+            if first is not None:
+                self.language = self.detect_language(first[0])
+                source = chain([first], source)
+        
+        for segment, idx, offset_ms, output in self._iter_pipeline_outputs(source):
+            segment_seconds = self._segment_seconds(segment)
+            # Sessizliği çıkarılmış segmentlerde zamanlar kaynak kayda göre yeniden hesaplanır
+            spans = getattr(segment, "spans", None)
+            completed += 1
+            audio_seconds += segment_seconds
+            failed += output is None
+            text = output["text"].strip() if output is not None else ""
+            chunks = pipeline_chunks(output, offset_ms / 1000, segment_seconds, spans) if output is not None else []
+            if output is not None:
+                succeeded += 1
+                logger.info(f"Segment {idx+1}/{total_segments or '?'} transkripsiyon tamamlandı "
+                            f"(başlangıç: {offset_ms / 1000:.1f}s). Uzunluk: {len(text)} karakter")
+                if checkpoint is not None:
+                    checkpoint.record(offset_ms, segment_seconds, text, chunks)
             
-            try:
-                transcription = self.model(
-                    inputs=segment_path, 
-                    return_timestamps=True,
-                    batch_size=16,
-                    chunk_length_s=30
-                )["text"]
-                
-                full_transcription += transcription + " "
-                logger.info(f"Segment {idx+1} transkripsiyon tamamlandı. Uzunluk: {len(transcription)} karakter")
-            except Exception as e:
-                logger.error(f"Segment {idx+1} transkripsiyon hatası: {e}")
-                continue
+            yield build_result(idx, offset_ms, segment_seconds, source_time(segment_seconds, spans),
+                               text, chunks, output is None, False)
         
-        if not full_transcription.strip():
-            logger.error("Transkripsiyon boş! Ses dosyası işlenemedi veya içerik algılanamadı.")
-            return "Transkripsiyon işlemi başarısız oldu. Lütfen ses dosyasını kontrol edin."
+        logger.info(f"Transkripsiyon istatistikleri ({self.device}, {self.dtype}): {self.last_run_stats}")
+
+    def transcribe(self, segment_files: Iterable[Tuple[Union[str, np.ndarray], int, int]],
+                   progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   checkpoint: Optional[TranscriptionCheckpoint] = None) -> Transcript:
+        """Ses segmentlerini transkribe eder ve zaman damgalı Transcript olarak döndürür.
+
+        segment_files bir liste ya da segmentleri hazır oldukça üreten bir üreteç olabilir.
+        progress_callback verilirse her segment tamamlandığında iter_transcriptions sonucu ile çağrılır;
+        geri çağrıdan yükselen bir istisna işlemi durdurur.
+        """
+        builder = TranscriptBuilder()
+        for result in self.iter_transcriptions(segment_files, checkpoint):
+            builder.add_chunks(result["chunks"])
+            if progress_callback:
+                progress_callback(result)
         
-        return full_transcription
+        transcript = builder.build()
+        if not transcript.text.strip():
+            logger.error("Transkripsiyon boş! Ses dosyası işlenemedi veya içerik algılanamadı.")
+        return transcript
+
+    def transcribe_segments(self, segment_files: Iterable[Tuple[Union[str, np.ndarray], int, int]],
+                            progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+        """Ses segmentlerini transkribe eder ve düz metin olarak birleştirir."""
+        transcript = self.transcribe(segment_files, progress_callback)
+        return transcript.text if transcript.text.strip() else self.EMPTY_RESULT_MESSAGE
     
     def cleanup(self) -> None:
-        """Model belleğini temizler."""
-        del self.model
-        self.model = None
+        """Modeli paylaşılan önbelleğe bırakır ve geçici belleği temizler; model sıcak kalır."""
+        if self.model is not None:
+            self.model = None
+            MODEL_CACHE.release()
         
         if self.device == "cuda":
-            torch.cuda.empty_cache()
\ No newline at end of file
+            torch.cuda.empty_cache()
+        logger.info(f"Whisper model önbelleği: {MODEL_CACHE.stats()}")
+
+    @staticmethod
+    def model_cache_stats() -> Dict[str, Any]:
+        """Paylaşılan model önbelleğinin yükleme ve isabet istatistiklerini döndürür."""
+        return MODEL_CACHE.stats()
\ No newline at end of file
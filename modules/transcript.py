@@ -0,0 +1,188 @@
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """Saniyeyi SRT (virgül) veya VTT (nokta) zaman biçimine çevirir."""
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def source_time(seconds: float, spans: Optional[Sequence[Tuple[float, float]]] = None) -> float:
+    """Segment içindeki zamanı, çıkarılan sessizlikleri geri ekleyerek segment ofsetine göre kaynak zamana çevirir."""
+    if not spans:
+        return seconds
+    i = max(0, bisect_right([segment_start for segment_start, _ in spans], seconds) - 1)
+    segment_start, source_start = spans[i]
+    return source_start + seconds - segment_start
+
+
+def pipeline_chunks(output: Dict[str, Any], offset_s: float, duration_s: float,
+                    spans: Optional[Sequence[Tuple[float, float]]] = None) -> List[Tuple[float, float, str]]:
+    """Whisper pipeline çıktısındaki parçaları segment ofsetine göre mutlak zamanlı üçlülere çevirir.
+
+    spans verilirse (bkz. SpeechSegment) segmentten çıkarılmış sessizlikler zamanlara geri eklenir.
+    """
+    chunks = output.get("chunks") or [{"timestamp": (0.0, duration_s), "text": output.get("text", "")}]
+    result = []
+    for chunk in chunks:
+        start, end = chunk.get("timestamp") or (0.0, duration_s)
+        start = start or 0.0
+        end = duration_s if end is None else end
+        result.append((offset_s + source_time(start, spans), offset_s + source_time(end, spans),
+                       chunk.get("text", "").strip()))
+    return result
+
+
+class Transcript:
+    """Zaman damgalı transkripsiyonun kompakt gösterimi.
+
+    Tüm metin tek bir string'de tutulur; her parça için başlangıç/bitiş zamanları ve metin
+    içindeki karakter aralığı dizilerde saklanır. Zamana göre arama O(log n)'dir ve slice()
+    metni veya dizileri kopyalamadan aynı tamponlar üzerinde bir görünüm döndürür.
+    """
+
+    __slots__ = ("_text", "_starts", "_ends", "_span_begins", "_span_ends", "_lo", "_hi")
+
+    def __init__(self, text: str, starts: array, ends: array, span_begins: array, span_ends: array,
+                 lo: int = 0, hi: Optional[int] = None):
+        self._text = text
+        self._starts = starts
+        self._ends = ends
+        self._span_begins = span_begins
+        self._span_ends = span_ends
+        self._lo = lo
+        self._hi = len(starts) if hi is None else hi
+
+    @classmethod
+    def from_text(cls, text: str) -> "Transcript":
+        """Zaman bilgisi olmayan düz metinden tek parçalı bir transkripsiyon oluşturur."""
+        builder = TranscriptBuilder()
+        builder.add(0.0, 0.0, text)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        for i in range(len(self)):
+            yield self.chunk(i)
+
+    def chunk(self, i: int) -> Tuple[float, float, str]:
+        """i. parçanın (başlangıç, bitiş, metin) üçlüsünü döndürür."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        j = self._lo + i
+        return self._starts[j], self._ends[j], self._text[self._span_begins[j]:self._span_ends[j]]
+
+    @property
+    def text(self) -> str:
+        if not len(self):
+            return ""
+        if self._lo == 0 and self._hi == len(self._starts):
+            return self._text
+        return self._text[self._span_begins[self._lo]:self._span_ends[self._hi - 1]]
+
+    @property
+    def start(self) -> float:
+        return self._starts[self._lo] if len(self) else 0.0
+
+    @property
+    def end(self) -> float:
+        return self._ends[self._hi - 1] if len(self) else 0.0
+
+    def index_at(self, seconds: float) -> int:
+        """Verilen andaki (veya o andan önce başlayan son) parçanın sırasını döndürür; yoksa -1."""
+        return bisect_right(self._starts, seconds, self._lo, self._hi) - 1 - self._lo
+
+    def slice(self, start_s: float, end_s: float) -> "Transcript":
+        """[start_s, end_s) aralığıyla kesişen parçaları kopyalamadan görünüm olarak döndürür."""
+        lo = bisect_right(self._ends, start_s, self._lo, self._hi)
+        hi = bisect_left(self._starts, end_s, lo, self._hi)
+        return Transcript(self._text, self._starts, self._ends, self._span_begins, self._span_ends, lo, hi)
+
+    def to_srt(self) -> str:
+        lines = []
+        for number, (start, end, text) in enumerate(self, 1):
+            lines.append(f"{number}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n")
+        return "\n".join(lines)
+
+    def to_vtt(self) -> str:
+        lines = ["WEBVTT\n"]
+        for start, end, text in self:
+            lines.append(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n")
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps([{"start": round(start, 3), "end": round(end, 3), "text": text}
+                           for start, end, text in self], ensure_ascii=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Önbellek ve kontrol noktaları için sıkıştırılmış sözlük gösterimi."""
+        view = self if self._lo == 0 and self._hi == len(self._starts) else self.copy()
+        return {
+            "text": view._text,
+            "starts": view._starts.tolist(),
+            "ends": view._ends.tolist(),
+            "spans": [view._span_begins.tolist(), view._span_ends.tolist()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Transcript":
+        begins, ends = data["spans"]
+        return cls(data["text"], array("d", data["starts"]), array("d", data["ends"]),
+                   array("q", begins), array("q", ends))
+
+    def copy(self) -> "Transcript":
+        """Görünümü bağımsız, kompakt bir transkripsiyona dönüştürür."""
+        builder = TranscriptBuilder()
+        for start, end, text in self:
+            builder.add(start, end, text)
+        return builder.build()
+
+
+class TranscriptBuilder:
+    """Parçaları sırayla ekleyerek tek metin tamponlu bir Transcript oluşturur."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._starts = array("d")
+        self._ends = array("d")
+        self._span_begins = array("q")
+        self._span_ends = array("q")
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def add(self, start: float, end: float, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        if self._parts:
+            self._parts.append(" ")
+            self._length += 1
+
+        # Zaman dizileri ikili arama için sıralı kalmalıdır
+        if self._starts:
+            start = max(start, self._starts[-1])
+            end = max(end, self._ends[-1])
+        end = max(end, start)
+
+        self._starts.append(start)
+        self._ends.append(end)
+        self._span_begins.append(self._length)
+        self._parts.append(text)
+        self._length += len(text)
+        self._span_ends.append(self._length)
+
+    def add_chunks(self, chunks: List[Tuple[float, float, str]]) -> None:
+        for start, end, text in chunks:
+            self.add(start, end, text)
+
+    def build(self) -> Transcript:
+        return Transcript("".join(self._parts), self._starts, self._ends, self._span_begins, self._span_ends)
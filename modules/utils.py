@@ -3,10 +3,12 @@ from datetime import datetime
 import logging
 import gc
 import re
-import subprocess
+import shutil
 import time
-from typing import Tuple
-from config import RESULT_DIR
+import uuid
+from typing import Optional, Tuple
+from config import RESULT_DIR, TEMP_DIR, JOB_WORKSPACE_MAX_AGE_HOURS
+from modules.model_registry import MODEL_REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +28,60 @@ def get_timestamp() -> str:
     """Dosya isimlendirmesi için zaman damgası oluşturur."""
     return datetime.now().strftime("%H_%M_%d_%m_%Y")
 
-def save_results(transcription: str, summary: str, file_base_name: str = None) -> Tuple[str, str]:
+class JobWorkspace:
+    """Her iş için ayrı bir kimlik ve geçici dizin sağlar; dizin iş nasıl biterse bitsin silinir."""
+
+    PREFIX = "job_"
+
+    def __init__(self, job_id: Optional[str] = None, root: str = TEMP_DIR):
+        self.job_id = job_id or f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(root, f"{self.PREFIX}{self.job_id}")
+
+    def __enter__(self) -> "JobWorkspace":
+        os.makedirs(self.path, exist_ok=True)
+        logger.info(f"İş çalışma alanı oluşturuldu: {self.path}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.cleanup()
+        return False
+
+    def file(self, name: str) -> str:
+        """Çalışma alanı içinde bir dosya yolu döndürür."""
+        return os.path.join(self.path, name)
+
+    def cleanup(self) -> None:
+        """Çalışma alanını ve içindeki tüm geçici dosyaları siler."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        if os.path.exists(self.path):
+            logger.warning(f"İş çalışma alanı tamamen silinemedi: {self.path}")
+        else:
+            logger.info(f"İş çalışma alanı temizlendi: {self.job_id}")
+
+    @staticmethod
+    def cleanup_stale(root: str = TEMP_DIR, max_age_hours: float = JOB_WORKSPACE_MAX_AGE_HOURS) -> int:
+        """Çöken süreçlerden kalan eski iş dizinlerini siler."""
+        removed = 0
+        cutoff = time.time() - max_age_hours * 3600
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            try:
+                if name.startswith(JobWorkspace.PREFIX) and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"{path} temizlenirken hata: {e}")
+        if removed:
+            logger.info(f"{removed} eski iş çalışma alanı temizlendi")
+        return removed
+
+def save_results(transcription: str, summary: str, file_base_name: str = None, transcript=None) -> Tuple[str, str]:
     """
     Args:
         transcription: Kaydedilecek transkripsiyon metni
         summary: Kaydedilecek özet metni
         file_base_name: Orijinal dosya adı (opsiyonel)
+        transcript: Zaman damgalı Transcript; verilirse SRT ve VTT altyazıları da kaydedilir (opsiyonel)
         
     Returns:
         Kaydedilen dosya yolları (transkripsiyon, özet)
@@ -53,6 +103,11 @@ def save_results(transcription: str, summary: str, file_base_name: str = None) -
     with open(summary_file, "w", encoding="utf-8") as f:
         f.write(summary)
     
+    if transcript is not None and len(transcript):
+        for extension, content in (("srt", transcript.to_srt()), ("vtt", transcript.to_vtt())):
+            with open(os.path.join(RESULT_DIR, f"transcription_{base_name}.{extension}"), "w", encoding="utf-8") as f:
+                f.write(content)
+    
     logger.info(f"Transkripsiyon kaydedildi: {transcription_file}")
     logger.info(f"Özet kaydedildi: {summary_file}")
     
@@ -70,22 +125,10 @@ def kill_stalled_processes(process_name="ollama"):
         logger.warning(f"Süreç temizleme başarısız: {e}")
 
 def ensure_ollama_running():
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, 
-            text=True, 
-            timeout=5,
-            check=False
-        )
-        
-        if result.returncode != 0:
-            logger.warning("Ollama servisi çalışmıyor olabilir!")
-            return False
-        return True
-    except Exception as e:
-        logger.error(f"Ollama durum kontrolü başarısız: {e}")
+    if not MODEL_REGISTRY.is_available():
+        logger.warning("Ollama servisi çalışmıyor olabilir!")
         return False
+    return True
 
 def monitor_process_with_timeout(func, args=None, kwargs=None, timeout=180):
     import threading
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from modules.text_chunker import TextChunker, TokenCounter
+
+BUDGET = 3600
+OVERLAP = 200
+WORDS = {
+    "tr": ["yapay", "zeka", "modeli", "öğrenme", "verisi", "için", "çok", "önemli", "bir", "konudur", "ve"],
+    "en": ["artificial", "intelligence", "model", "learning", "data", "is", "a", "very", "important", "topic"],
+}
+
+
+def make_text(lang: str, punctuated: bool, words: int = 20000) -> str:
+    rng = random.Random(7)
+    parts = []
+    for i in range(words):
+        parts.append(rng.choice(WORDS[lang]))
+        if punctuated and i % rng.randint(8, 25) == 0:
+            parts[-1] += "."
+    return " ".join(parts)
+
+
+@pytest.mark.parametrize("lang", ["tr", "en"])
+@pytest.mark.parametrize("punctuated", [False, True])
+def test_chunks_stay_within_budget(lang, punctuated):
+    chunks = TextChunker.chunk(make_text(lang, punctuated), BUDGET, OVERLAP, lang)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert TokenCounter.count(chunk, lang) <= BUDGET
+
+
+@pytest.mark.parametrize("lang", ["tr", "en"])
+def test_unpunctuated_chunks_fill_budget(lang):
+    chunks = TextChunker.chunk(make_text(lang, punctuated=False), BUDGET, 0, lang)
+    for chunk in chunks[:-1]:
+        assert TokenCounter.count(chunk, lang) >= BUDGET * 0.98